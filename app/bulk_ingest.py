@@ -0,0 +1,278 @@
+"""Offline bulk ingestion: build a collection's catalog and index without the HTTP server.
+
+    python -m app.bulk_ingest /path/to/corpus --collection manuals --workers 8
+
+OCR runs in a pool of worker processes while the main process embeds
+finished documents in large batches. Every processed document is committed
+to the catalog straight away and the index is saved every
+--checkpoint-chunks vectors, so an interrupted run picks up where it
+stopped: files whose content hash is already catalogued are skipped, and
+catalogued documents missing from the index are embedded first.
+
+The result is an ordinary collection (COLLECTIONS_DIR/<name> holds
+catalog.db and faiss_index/), which a server loads as-is. Copy that
+directory into another device's COLLECTIONS_DIR to ship it.
+"""
+
+import os
+import sys
+import time
+import uuid
+import shutil
+import hashlib
+import argparse
+import multiprocessing
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+import logging
+
+from app.config import settings
+from app.collection_manager import Collection, CollectionManager
+from app.utils import chunk_text, setup_logging
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_FORMATS = {'.pdf', '.png', '.jpg', '.jpeg', '.tiff', '.bmp'}
+
+# Per-process OCR engine, created by the pool initializer
+_worker_ocr = None
+
+
+def _init_worker():
+    global _worker_ocr
+    from app.ocr import OCRProcessor
+
+    _worker_ocr = OCRProcessor()
+
+
+def _ocr_file(path: str) -> Tuple[int, List[Dict]]:
+    """OCR and chunk one file in a worker process; returns (pages, chunks)"""
+    text_content = _worker_ocr.process_document(path)
+    chunks = chunk_text(text_content, chunk_size=512, overlap=50)
+    return len(text_content.get('pages', [])), chunks
+
+
+def iter_source_files(source_dir: str) -> Iterator[str]:
+    """Supported files under source_dir, in a stable order"""
+    for root, dirs, files in os.walk(source_dir):
+        dirs.sort()
+        for name in sorted(files):
+            if os.path.splitext(name)[1].lower() in SUPPORTED_FORMATS:
+                yield os.path.join(root, name)
+
+
+def file_hash(path: str) -> str:
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+class BulkIngester:
+    """Feeds OCR results into the catalog and batches their chunks into the index"""
+
+    def __init__(self, collection: Collection, workers: int, embed_batch: int,
+                 checkpoint_chunks: int, copy_files: bool = False):
+        self.collection = collection
+        self.catalog = collection.catalog
+        self.retriever = collection.retriever
+        self.workers = max(workers, 1)
+        self.embed_batch = max(embed_batch, 1)
+        self.checkpoint_chunks = max(checkpoint_chunks, 1)
+        self.copy_files = copy_files
+
+        self._embedding_manager = None
+        self._texts: List[str] = []
+        self._metadata: List[Dict] = []
+        self._unsaved_vectors = 0
+
+        self.stats = {'files_seen': 0, 'files_skipped': 0, 'files_failed': 0,
+                      'documents_added': 0, 'chunks_indexed': 0}
+
+    def _get_embedding_manager(self):
+        if self._embedding_manager is None:
+            from app.embedding import EmbeddingManager
+
+            self._embedding_manager = EmbeddingManager()
+        return self._embedding_manager
+
+    def _queue_document(self, doc: Dict):
+        for idx, chunk in enumerate(doc.get('chunks', [])):
+            self._texts.append(chunk['text'])
+            self._metadata.append({
+                'doc_id': doc['doc_id'],
+                'filename': doc['filename'],
+                'page': chunk.get('page', 0),
+                'chunk_id': idx
+            })
+
+        if len(self._texts) >= self.embed_batch:
+            self._flush()
+
+    def _flush(self, checkpoint: bool = False):
+        """Embed queued chunks, append them to the index and save at checkpoints"""
+        if self._texts:
+            embeddings = self._get_embedding_manager().generate_embeddings(self._texts)
+            self.retriever.add_vectors(embeddings, self._metadata, save=False)
+
+            self.stats['chunks_indexed'] += len(self._texts)
+            self._unsaved_vectors += len(self._texts)
+            self._texts, self._metadata = [], []
+
+        if checkpoint or self._unsaved_vectors >= self.checkpoint_chunks:
+            self._save_checkpoint()
+
+    def _save_checkpoint(self):
+        """Persist vectors embedded so far; queued chunks are re-read from the catalog on resume"""
+        if self._unsaved_vectors:
+            self.retriever.save_index()
+            self._unsaved_vectors = 0
+            logger.info(f"Checkpoint: {self.retriever.ntotal} vectors saved")
+
+    def _resume_unindexed(self):
+        """Embed documents catalogued by an earlier run (or uploads) that never reached the index"""
+        indexed = self.retriever.doc_ids()
+        resumed = 0
+
+        # Chunk text is only loaded for the documents that actually need embedding
+        for doc in self.catalog.iter_documents(include_chunks=False):
+            if doc['num_chunks'] and doc['doc_id'] not in indexed:
+                self._queue_document(self.catalog.get_document(doc['doc_id']))
+                resumed += 1
+
+        if resumed:
+            logger.info(f"Resuming: embedding {resumed} catalogued documents missing from the index")
+
+    def _store_document(self, path: str, content_hash: str, pages: int, chunks: List[Dict]) -> Dict:
+        doc_id = f"doc_{uuid.uuid4().hex[:12]}"
+
+        # Without a copy the server has no file of its own, so deleting the document never touches the corpus
+        file_path = None
+        if self.copy_files:
+            file_path = os.path.join(settings.UPLOAD_DIR, f"{doc_id}{os.path.splitext(path)[1].lower()}")
+            shutil.copyfile(path, file_path)
+
+        doc = {
+            'doc_id': doc_id,
+            'filename': os.path.basename(path),
+            'file_path': file_path,
+            'pages': pages,
+            'content_hash': content_hash,
+            'created_at': time.time(),
+            'chunks': chunks
+        }
+        self.catalog.add_document(doc)
+        return doc
+
+    def _collect(self, future: Future, path: str, content_hash: str):
+        try:
+            pages, chunks = future.result()
+        except Exception as e:
+            self.stats['files_failed'] += 1
+            logger.error(f"Failed to process {path}: {e}")
+            return
+
+        doc = self._store_document(path, content_hash, pages, chunks)
+        self.stats['documents_added'] += 1
+        self._queue_document(doc)
+
+        if self.stats['documents_added'] % 100 == 0:
+            logger.info(f"Processed {self.stats['documents_added']} documents "
+                        f"({self.stats['files_skipped']} skipped, {self.stats['files_failed']} failed)")
+
+    def run(self, source_dir: str) -> Dict:
+        start_time = time.time()
+
+        self._resume_unindexed()
+
+        # Spawned workers do not inherit the main process's torch threads or model
+        context = multiprocessing.get_context("spawn")
+        pending: Dict[Future, Tuple[str, str]] = {}
+        seen_hashes: Set[str] = set()
+
+        try:
+            with ProcessPoolExecutor(max_workers=self.workers, mp_context=context,
+                                     initializer=_init_worker) as pool:
+                for path in iter_source_files(source_dir):
+                    self.stats['files_seen'] += 1
+
+                    content_hash = file_hash(path)
+                    if content_hash in seen_hashes or self.catalog.find_by_content_hash(content_hash):
+                        self.stats['files_skipped'] += 1
+                        continue
+                    seen_hashes.add(content_hash)
+
+                    pending[pool.submit(_ocr_file, path)] = (path, content_hash)
+
+                    # Bound the queue so OCR results do not pile up while embedding runs
+                    if len(pending) >= self.workers * 2:
+                        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            self._collect(future, *pending.pop(future))
+
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        self._collect(future, *pending.pop(future))
+
+            self._flush(checkpoint=True)
+        finally:
+            # Keep whatever was embedded if the run is interrupted
+            self._save_checkpoint()
+            self.catalog.checkpoint()
+
+        self.stats['total_vectors'] = self.retriever.ntotal
+        self.stats['index_size_mb'] = self.retriever.get_index_size_mb()
+        self.stats['elapsed_seconds'] = time.time() - start_time
+        return self.stats
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Build a collection's catalog and index offline")
+    parser.add_argument("source_dir", help="Directory to ingest (searched recursively)")
+    parser.add_argument("--collection", default=settings.DEFAULT_COLLECTION,
+                        help="Collection to build or extend")
+    parser.add_argument("--workers", type=int, default=max((os.cpu_count() or 2) - 1, 1),
+                        help="OCR worker processes")
+    parser.add_argument("--embed-batch", type=int, default=4096,
+                        help="Chunks accumulated before each embedding call")
+    parser.add_argument("--checkpoint-chunks", type=int, default=50000,
+                        help="Save the index after this many new vectors")
+    parser.add_argument("--copy-files", action="store_true",
+                        help="Copy source files into UPLOAD_DIR like /upload does")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    setup_logging()
+
+    if not os.path.isdir(args.source_dir):
+        logger.error(f"Not a directory: {args.source_dir}")
+        return 1
+
+    try:
+        CollectionManager.validate_name(args.collection)
+    except ValueError as e:
+        logger.error(str(e))
+        return 1
+
+    ingester = BulkIngester(
+        Collection(args.collection),
+        workers=args.workers,
+        embed_batch=args.embed_batch,
+        checkpoint_chunks=args.checkpoint_chunks,
+        copy_files=args.copy_files
+    )
+    stats = ingester.run(args.source_dir)
+
+    logger.info(f"Bulk ingestion finished in {stats['elapsed_seconds']:.1f}s: "
+                f"{stats['documents_added']} added, {stats['files_skipped']} skipped, "
+                f"{stats['files_failed']} failed, {stats['total_vectors']} vectors "
+                f"({stats['index_size_mb']:.1f}MB)")
+    return 0 if stats['files_failed'] == 0 else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,259 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from typing import Dict, Iterator, List, Optional, Tuple
+import logging
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Document-level columns exposed by listings (chunk text lives in its own table)
+CATALOG_FIELDS = ('doc_id', 'filename', 'file_path', 'pages', 'num_chunks', 'content_hash', 'created_at')
+
+
+class DocumentCatalog:
+    """SQLite (WAL mode) store for documents and their chunks.
+
+    Documents and chunks live in separate tables so listings never read
+    chunk text, and each upload is a single transaction that only writes
+    the new rows.
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or os.path.join(settings.PROCESSED_DIR, "catalog.db")
+        self._local = threading.local()
+        self._create_schema()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Return a connection owned by the calling thread"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30.0, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            # WAL lets readers proceed while a writer commits; NORMAL sync is durable in WAL mode
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    def _transaction(self):
+        return _Transaction(self._connect())
+
+    def _create_schema(self):
+        with self._transaction() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS documents (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    doc_id TEXT NOT NULL UNIQUE,
+                    filename TEXT NOT NULL,
+                    file_path TEXT,
+                    pages INTEGER NOT NULL DEFAULT 0,
+                    num_chunks INTEGER NOT NULL DEFAULT 0,
+                    content_hash TEXT,
+                    created_at REAL NOT NULL
+                )
+            """)
+
+            # Catalogs created before content hashing lack the column
+            columns = {row['name'] for row in conn.execute("PRAGMA table_info(documents)")}
+            if 'content_hash' not in columns:
+                conn.execute("ALTER TABLE documents ADD COLUMN content_hash TEXT")
+
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_documents_filename ON documents(filename)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_documents_content_hash ON documents(content_hash)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS chunks (
+                    doc_id TEXT NOT NULL REFERENCES documents(doc_id) ON DELETE CASCADE,
+                    chunk_id INTEGER NOT NULL,
+                    page INTEGER NOT NULL DEFAULT 0,
+                    text TEXT NOT NULL,
+                    PRIMARY KEY (doc_id, chunk_id)
+                ) WITHOUT ROWID
+            """)
+
+    def add_document(self, doc: Dict):
+        """Insert or replace a document and its chunks in one transaction"""
+        chunks = doc.get('chunks', [])
+
+        with self._transaction() as conn:
+            conn.execute(
+                """
+                INSERT INTO documents (doc_id, filename, file_path, pages, num_chunks, content_hash, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(doc_id) DO UPDATE SET
+                    filename = excluded.filename,
+                    file_path = excluded.file_path,
+                    pages = excluded.pages,
+                    num_chunks = excluded.num_chunks,
+                    content_hash = excluded.content_hash
+                """,
+                (
+                    doc['doc_id'],
+                    doc['filename'],
+                    doc.get('file_path'),
+                    doc.get('pages', 0),
+                    len(chunks),
+                    doc.get('content_hash'),
+                    doc.get('created_at', time.time())
+                )
+            )
+            conn.execute("DELETE FROM chunks WHERE doc_id = ?", (doc['doc_id'],))
+            conn.executemany(
+                "INSERT INTO chunks (doc_id, chunk_id, page, text) VALUES (?, ?, ?, ?)",
+                [(doc['doc_id'], idx, chunk.get('page', 0), chunk['text']) for idx, chunk in enumerate(chunks)]
+            )
+
+    def delete_document(self, doc_id: str) -> bool:
+        """Delete a document and its chunks; returns False if it did not exist"""
+        with self._transaction() as conn:
+            cur = conn.execute("DELETE FROM documents WHERE doc_id = ?", (doc_id,))
+        return cur.rowcount > 0
+
+    def migrate_json(self, json_path: str):
+        """Import a legacy documents.json once, then move it aside"""
+        if not os.path.exists(json_path):
+            return
+
+        with open(json_path, 'r') as f:
+            documents = json.load(f)
+
+        for doc in documents.values():
+            self.add_document(doc)
+
+        os.replace(json_path, json_path + ".migrated")
+        logger.info(f"Migrated {len(documents)} documents from {json_path}")
+
+    def get_document(self, doc_id: str, include_chunks: bool = True) -> Optional[Dict]:
+        """Get a document, optionally with its chunks"""
+        conn = self._connect()
+        row = conn.execute(
+            f"SELECT {', '.join(CATALOG_FIELDS)} FROM documents WHERE doc_id = ?", (doc_id,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        doc = dict(row)
+        if include_chunks:
+            doc['chunks'] = [
+                {'text': r['text'], 'page': r['page']}
+                for r in conn.execute(
+                    "SELECT page, text FROM chunks WHERE doc_id = ? ORDER BY chunk_id", (doc_id,)
+                )
+            ]
+        return doc
+
+    def get_chunk_texts(self, keys: List[Tuple[str, int]]) -> Dict[Tuple[str, int], str]:
+        """Look up chunk text for (doc_id, chunk_id) pairs"""
+        conn = self._connect()
+        texts = {}
+        for doc_id, chunk_id in keys:
+            row = conn.execute(
+                "SELECT text FROM chunks WHERE doc_id = ? AND chunk_id = ?", (doc_id, chunk_id)
+            ).fetchone()
+            if row is not None:
+                texts[(doc_id, chunk_id)] = row['text']
+        return texts
+
+    def iter_documents(self, include_chunks: bool = True) -> Iterator[Dict]:
+        """Iterate over all documents in insertion order"""
+        doc_ids = [r['doc_id'] for r in self._connect().execute("SELECT doc_id FROM documents ORDER BY seq")]
+        for doc_id in doc_ids:
+            doc = self.get_document(doc_id, include_chunks=include_chunks)
+            if doc is not None:
+                yield doc
+
+    def count(self, filename: Optional[str] = None) -> int:
+        """Count documents matching the filter"""
+        where, params = self._build_filter(filename)
+        row = self._connect().execute(f"SELECT COUNT(*) FROM documents {where}", params).fetchone()
+        return row[0]
+
+    def find_by_content_hash(self, content_hash: str) -> Optional[str]:
+        """doc_id of a document with this content hash, if any"""
+        row = self._connect().execute(
+            "SELECT doc_id FROM documents WHERE content_hash = ? LIMIT 1", (content_hash,)
+        ).fetchone()
+        return row['doc_id'] if row is not None else None
+
+    def checkpoint(self):
+        """Fold the WAL into the main database file so it can be copied on its own"""
+        self._connect().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def list_documents(self, cursor: Optional[str] = None, limit: int = 50,
+                       fields: Optional[List[str]] = None,
+                       filename: Optional[str] = None) -> Tuple[List[Dict], Optional[str]]:
+        """List documents with keyset pagination.
+
+        Returns the page of documents and the cursor for the next page, or
+        None when the last page has been reached.
+        """
+        columns = list(fields) if fields else list(CATALOG_FIELDS)
+        unknown = [c for c in columns if c not in CATALOG_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+
+        where, params = self._build_filter(filename, after_seq=self._decode_cursor(cursor))
+        select = ', '.join(['seq'] + columns)
+
+        rows = self._connect().execute(
+            f"SELECT {select} FROM documents {where} ORDER BY seq LIMIT ?",
+            params + [limit + 1]
+        ).fetchall()
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        documents = [{c: row[c] for c in columns} for row in rows]
+        next_cursor = str(rows[-1]['seq']) if has_more else None
+
+        return documents, next_cursor
+
+    @staticmethod
+    def _decode_cursor(cursor: Optional[str]) -> Optional[int]:
+        if not cursor:
+            return None
+        try:
+            return int(cursor)
+        except ValueError:
+            raise ValueError(f"Invalid cursor: {cursor}")
+
+    @staticmethod
+    def _build_filter(filename: Optional[str] = None, after_seq: Optional[int] = None) -> Tuple[str, List]:
+        clauses = []
+        params = []
+
+        if after_seq is not None:
+            clauses.append("seq > ?")
+            params.append(after_seq)
+
+        if filename:
+            # Match the substring literally; % and _ in filenames are not wildcards
+            escaped = filename.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            clauses.append("filename LIKE ? ESCAPE '\\'")
+            params.append(f"%{escaped}%")
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        return where, params
+
+
+class _Transaction:
+    """Context manager running statements inside BEGIN IMMEDIATE ... COMMIT"""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def __enter__(self) -> sqlite3.Connection:
+        # Take the write lock up front so concurrent writers queue instead of deadlocking
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.conn.execute("COMMIT")
+        else:
+            self.conn.execute("ROLLBACK")
+        return False
@@ -0,0 +1,184 @@
+import os
+import re
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Callable, List, Optional, Union
+import logging
+
+from app.config import settings
+from app.catalog import DocumentCatalog
+from app.ingestion import DocumentIngestion
+from app.retriever import FAISSRetriever
+from app.sharded_retriever import ShardedFAISSRetriever, open_retriever
+
+logger = logging.getLogger(__name__)
+
+COLLECTION_NAME_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+# Retrievers by index directory; an evicted collection may still be serving a request
+# or compacting, and reopening it must share that retriever rather than load a second one
+_retrievers = weakref.WeakValueDictionary()
+_retrievers_lock = threading.Lock()
+
+
+def _shared_retriever(index_dir: str, catalog: DocumentCatalog) -> Union[FAISSRetriever, ShardedFAISSRetriever]:
+    """The live retriever for index_dir, opening it if no one holds it"""
+    key = os.path.realpath(index_dir)
+    with _retrievers_lock:
+        retriever = _retrievers.get(key)
+        if retriever is None:
+            retriever = open_retriever(index_dir, catalog)
+            _retrievers[key] = retriever
+        return retriever
+
+
+class CollectionNotFoundError(Exception):
+    """Raised when a read-only request names a collection that does not exist"""
+
+    def __init__(self, name: str):
+        super().__init__(f"Collection not found: {name}")
+        self.name = name
+
+
+class Collection:
+    """A named, isolated set of documents with its own chunk store and index"""
+
+    def __init__(self, name: str, on_retriever_loaded: Optional[Callable[["Collection"], None]] = None):
+        self.name = name
+        self._on_retriever_loaded = on_retriever_loaded
+
+        if name == settings.DEFAULT_COLLECTION:
+            # Keep the pre-collection layout so existing data stays visible
+            self.index_dir = settings.FAISS_INDEX_PATH
+            db_path = os.path.join(settings.PROCESSED_DIR, "catalog.db")
+        else:
+            base_dir = os.path.join(settings.COLLECTIONS_DIR, name)
+            os.makedirs(base_dir, exist_ok=True)
+            self.index_dir = os.path.join(base_dir, "faiss_index")
+            db_path = os.path.join(base_dir, "catalog.db")
+
+        self.catalog = DocumentCatalog(db_path)
+        if name == settings.DEFAULT_COLLECTION:
+            self.catalog.migrate_json(os.path.join(settings.PROCESSED_DIR, "documents.json"))
+
+        self._ingestion = None
+        self._retriever = None
+        self._lock = threading.Lock()
+
+    @property
+    def ingestion(self) -> DocumentIngestion:
+        with self._lock:
+            if self._ingestion is None:
+                self._ingestion = DocumentIngestion(catalog=self.catalog)
+            return self._ingestion
+
+    @property
+    def retriever(self) -> Union[FAISSRetriever, ShardedFAISSRetriever]:
+        with self._lock:
+            loaded = self._retriever is None
+            if loaded:
+                self._retriever = _shared_retriever(self.index_dir, self.catalog)
+            retriever = self._retriever
+
+        # The index's memory footprint is only known once it is loaded
+        if loaded and self._on_retriever_loaded is not None:
+            self._on_retriever_loaded(self)
+        return retriever
+
+    def loaded_retriever(self) -> Optional[Union[FAISSRetriever, ShardedFAISSRetriever]]:
+        """The retriever if it has been opened, without loading it"""
+        return self._retriever
+
+    def memory_bytes(self) -> int:
+        return self._retriever.memory_bytes() if self._retriever is not None else 0
+
+
+class CollectionManager:
+    """Opens collections lazily and keeps them in an LRU under a memory budget"""
+
+    def __init__(self, memory_budget_mb: Optional[int] = None):
+        budget_mb = memory_budget_mb if memory_budget_mb is not None else settings.COLLECTION_MEMORY_BUDGET_MB
+        self.memory_budget = budget_mb * 1024 * 1024
+        self._open = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def validate_name(name: str):
+        if not COLLECTION_NAME_PATTERN.match(name):
+            raise ValueError(
+                f"Invalid collection name: {name!r} (use 1-64 letters, digits, '_' or '-')"
+            )
+
+    @staticmethod
+    def exists(name: str) -> bool:
+        if name == settings.DEFAULT_COLLECTION:
+            return True
+        return os.path.isdir(os.path.join(settings.COLLECTIONS_DIR, name))
+
+    def get(self, name: Optional[str] = None, create: bool = False) -> Collection:
+        """Return an open collection, opening it and evicting others as needed.
+
+        Only write paths pass create=True; reading an unknown collection
+        raises CollectionNotFoundError instead of creating it on disk.
+        """
+        name = name or settings.DEFAULT_COLLECTION
+        self.validate_name(name)
+
+        with self._lock:
+            collection = self._open.get(name)
+            if collection is None:
+                if not create and not self.exists(name):
+                    raise CollectionNotFoundError(name)
+
+                logger.info(f"Opening collection: {name}")
+                collection = Collection(name, on_retriever_loaded=self._retriever_loaded)
+                self._open[name] = collection
+            self._open.move_to_end(name)
+
+            # Indexes grow with uploads, so the budget is rechecked on every access too
+            self._evict(keep=name)
+            return collection
+
+    def _retriever_loaded(self, collection: Collection):
+        with self._lock:
+            if self._open.get(collection.name) is collection:
+                self._evict(keep=collection.name)
+
+    def _evict(self, keep: str):
+        """Close least recently used collections until under the memory budget.
+
+        The index memory is freed once the last request or compaction using
+        an evicted collection lets go of its retriever.
+        """
+        total = sum(c.memory_bytes() for c in self._open.values())
+
+        for name in list(self._open):
+            if total <= self.memory_budget:
+                break
+            if name == keep:
+                continue
+
+            evicted = self._open.pop(name)
+            total -= evicted.memory_bytes()
+            logger.info(f"Evicted collection {name} from memory")
+
+    def list_names(self) -> List[str]:
+        """Names of all collections on disk, open or not"""
+        names = {settings.DEFAULT_COLLECTION}
+        if os.path.isdir(settings.COLLECTIONS_DIR):
+            names.update(
+                entry for entry in os.listdir(settings.COLLECTIONS_DIR)
+                if os.path.isdir(os.path.join(settings.COLLECTIONS_DIR, entry))
+                and COLLECTION_NAME_PATTERN.match(entry)
+            )
+        return sorted(names)
+
+    def open_names(self) -> List[str]:
+        with self._lock:
+            return list(self._open)
+
+    def open_collections(self) -> List[Collection]:
+        """Loaded collections, without touching their LRU position"""
+        with self._lock:
+            return list(self._open.values())
@@ -7,6 +7,8 @@ class Settings(BaseSettings):
     # API Configuration
     API_KEY: str = "default-secret-key"
     ENABLE_TELEMETRY: bool = False
+    TIMING_HEADER_ENABLED: bool = False  # Add a Server-Timing stage breakdown to responses
+    WARMUP_ON_STARTUP: bool = True  # Preload and warm models/index in the background at boot
 
     # Model Configuration
     EMBEDDING_MODEL: str = "sentence-transformers/all-MiniLM-L6-v2"
@@ -21,11 +23,41 @@ class Settings(BaseSettings):
 
     # Resource Limits
     MAX_UPLOAD_SIZE_MB: int = 50
+    UPLOAD_CHUNK_SIZE_KB: int = 1024  # Streaming buffer per upload
+    MAX_CONCURRENT_UPLOADS: int = 2  # Uploads beyond this wait for a free slot
     EMBEDDING_BATCH_SIZE: int = 32
     LLM_CONTEXT_SIZE: int = 2048
     LLM_MAX_TOKENS: int = 512
     LLM_THREADS: int = 4
     LLM_TEMPERATURE: float = 0.7
+    LLM_MAX_CONCURRENCY: int = 2  # Generations beyond this queue (see llm_queue stage)
+
+    # Reranking Configuration
+    RERANK_ENABLED: bool = False  # Cross-encoder second stage for every query
+    RERANK_MODEL: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    RERANK_BATCH_SIZE: int = 16
+    RERANK_FETCH_MULTIPLIER: int = 4  # Over-fetch top_k * multiplier candidates
+    RERANK_MAX_CANDIDATES: int = 50  # Hard cap keeps rerank latency predictable
+    MMR_ENABLED: bool = False  # Maximal Marginal Relevance diversification
+    MMR_LAMBDA: float = 0.7  # 1.0 = pure relevance, 0.0 = pure diversity
+
+    # Index Maintenance
+    COMPACTION_THRESHOLD: float = 0.2  # Compact once this fraction of vectors is tombstoned
+    INDEX_SHARDS: int = 1  # >1 splits each index by document into shards searched in parallel
+    INDEX_SEARCH_THREADS: int = 0  # Threads for shard search and builds; 0 = one per CPU core
+
+    # OCR Configuration
+    OCR_MODE: str = "adaptive"  # "adaptive" (page classification, DPI selection, cache) or "legacy" (300 DPI)
+    OCR_MIN_DPI: int = 150  # Probe DPI; pages with normal-sized text are OCR'd at this resolution
+    OCR_MAX_DPI: int = 400
+    OCR_TARGET_TEXT_HEIGHT_PX: int = 30  # Word height tesseract reads most reliably
+    OCR_CACHE_DIR: str = "data/ocr_cache"
+    OCR_CACHE_MAX_MB: int = 512  # Least recently used pages are evicted beyond this
+
+    # Multi-worker serving (python -m app.serve)
+    SERVE_WORKERS: int = 2
+    EMBEDDING_SERVER_ADDRESS: str = ""  # Unix socket of the shared embedding process; empty loads the model in-process
+    INDEX_MMAP: bool = False  # Memory-map index snapshots so worker processes share one copy
 
     # Storage Configuration
     DATA_DIR: str = "data"
@@ -33,6 +65,11 @@ class Settings(BaseSettings):
     UPLOAD_DIR: str = "data/uploads"
     PROCESSED_DIR: str = "data/processed"
 
+    # Collections (the "default" collection uses FAISS_INDEX_PATH and PROCESSED_DIR)
+    COLLECTIONS_DIR: str = "data/collections"
+    DEFAULT_COLLECTION: str = "default"
+    COLLECTION_MEMORY_BUDGET_MB: int = 2048  # Open indexes are evicted LRU beyond this
+
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -44,4 +81,5 @@ settings = Settings()
 os.makedirs(settings.DATA_DIR, exist_ok=True)
 os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
 os.makedirs(settings.PROCESSED_DIR, exist_ok=True)
-os.makedirs(settings.FAISS_INDEX_PATH, exist_ok=True)
\ No newline at end of file
+os.makedirs(settings.FAISS_INDEX_PATH, exist_ok=True)
+os.makedirs(settings.COLLECTIONS_DIR, exist_ok=True)
\ No newline at end of file
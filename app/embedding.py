@@ -1,10 +1,9 @@
 import numpy as np
-from sentence_transformers import SentenceTransformer
-import torch
 from typing import List
 import logging
 
 from app.config import settings
+from app.metrics import timed
 
 logger = logging.getLogger(__name__)
 
@@ -13,6 +12,9 @@ class EmbeddingManager:
     def __init__(self):
         logger.info(f"Loading embedding model: {settings.EMBEDDING_MODEL}")
 
+        # Imported here so that importing the app does not pay for torch
+        from sentence_transformers import SentenceTransformer
+
         # Set device to CPU explicitly for 8GB RAM systems
         self.device = 'cpu'
 
@@ -26,6 +28,8 @@ class EmbeddingManager:
 
     def generate_embeddings(self, texts: List[str]) -> np.ndarray:
         """Generate embeddings for a list of texts"""
+        import torch
+
         if not texts:
             return np.array([])
 
@@ -38,7 +42,7 @@ class EmbeddingManager:
         for i in range(0, len(texts), batch_size):
             batch = texts[i:i + batch_size]
 
-            with torch.no_grad():
+            with torch.no_grad(), timed('embedding_batch'):
                 embeddings = self.model.encode(
                     batch,
                     convert_to_numpy=True,
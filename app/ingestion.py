@@ -1,72 +1,295 @@
 import os
-import json
+import time
 import uuid
+import asyncio
+import hashlib
 from pathlib import Path
-from typing import Dict, List
-from fastapi import UploadFile
+from typing import Dict, Iterator, List, Optional, Tuple
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
 import aiofiles
 
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:  # python-multipart < 0.0.13
+    from multipart.multipart import MultipartParser, parse_options_header
+
 from app.config import settings
+from app.catalog import DocumentCatalog
+from app.metrics import IN_FLIGHT, timed
 from app.ocr import OCRProcessor
 from app.utils import chunk_text
 
 
+class UploadTooLargeError(Exception):
+    """Raised when an upload exceeds MAX_UPLOAD_SIZE_MB"""
+
+
+class InvalidUploadError(Exception):
+    """Raised when an upload is not a multipart/form-data body with a file part"""
+
+
+# Shared across collections so the cap applies to the whole process
+_upload_slots = None
+
+
+def _get_upload_slots() -> asyncio.Semaphore:
+    global _upload_slots
+    if _upload_slots is None:
+        _upload_slots = asyncio.Semaphore(settings.MAX_CONCURRENT_UPLOADS)
+    return _upload_slots
+
+
+class MultipartUpload:
+    """The file part of a multipart/form-data request, read straight off the request stream.
+
+    Starlette's form parsing spools the whole body to a temporary file before
+    the endpoint runs, outside the size limit and the upload slots. Parsing
+    the stream here means the file is written once, as it arrives.
+    """
+
+    def __init__(self, request: Request, field_name: str = "file"):
+        content_type, params = parse_options_header(request.headers.get("content-type", ""))
+        if content_type != b"multipart/form-data" or b"boundary" not in params:
+            raise InvalidUploadError("Expected a multipart/form-data upload")
+
+        self.filename: Optional[str] = None
+        self._field_name = field_name.encode()
+        self._stream = request.stream()
+        self._buffer = bytearray()
+        self._in_file = False
+        self._file_done = False
+        self._headers: Dict[bytes, bytes] = {}
+        self._header_field = b""
+        self._header_value = b""
+
+        self._parser = MultipartParser(params[b"boundary"], {
+            'on_part_begin': self._on_part_begin,
+            'on_header_field': self._on_header_field,
+            'on_header_value': self._on_header_value,
+            'on_header_end': self._on_header_end,
+            'on_headers_finished': self._on_headers_finished,
+            'on_part_data': self._on_part_data,
+            'on_part_end': self._on_part_end,
+        })
+
+    async def start(self):
+        """Read up to the file part's headers, so its filename is known"""
+        while self.filename is None:
+            if not await self._feed():
+                raise InvalidUploadError(f"No '{self._field_name.decode()}' file in the upload")
+
+    async def read(self, size: int) -> bytes:
+        """Up to size bytes of the file's content; b'' once the file part has ended"""
+        while len(self._buffer) < size and not self._file_done:
+            if not await self._feed():
+                break
+
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+    async def _feed(self) -> bool:
+        """Parse the next piece of the request body; False once the body is exhausted"""
+        try:
+            chunk = await self._stream.__anext__()
+        except StopAsyncIteration:
+            return False
+
+        try:
+            self._parser.write(chunk)
+        except ValueError as e:
+            raise InvalidUploadError(f"Malformed multipart upload: {e}")
+        return True
+
+    def _on_part_begin(self):
+        self._headers = {}
+
+    def _on_header_field(self, data: bytes, start: int, end: int):
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def _on_header_end(self):
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field, self._header_value = b"", b""
+
+    def _on_headers_finished(self):
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        # Other form fields are skipped; only the first matching file part is read
+        if self.filename is None and options.get(b"name") == self._field_name and b"filename" in options:
+            self.filename = options[b"filename"].decode("utf-8", "replace")
+            self._in_file = True
+
+    def _on_part_data(self, data: bytes, start: int, end: int):
+        if self._in_file:
+            self._buffer += data[start:end]
+
+    def _on_part_end(self):
+        if self._in_file:
+            self._in_file = False
+            self._file_done = True
+
+
 class DocumentIngestion:
-    def __init__(self):
+    def __init__(self, catalog: Optional[DocumentCatalog] = None):
         self.ocr = OCRProcessor()
-        self.metadata_file = os.path.join(settings.PROCESSED_DIR, "documents.json")
-        self._load_metadata()
-
-    def _load_metadata(self):
-        """Load document metadata from disk"""
-        if os.path.exists(self.metadata_file):
-            with open(self.metadata_file, 'r') as f:
-                self.documents = json.load(f)
-        else:
-            self.documents = {}
-
-    def _save_metadata(self):
-        """Save document metadata to disk"""
-        with open(self.metadata_file, 'w') as f:
-            json.dump(self.documents, f, indent=2)
-
-    async def process_upload(self, file: UploadFile) -> Dict:
-        """Process uploaded file"""
+
+        # Documents and chunks are stored in SQLite; each upload only writes its own rows
+        if catalog is None:
+            catalog = DocumentCatalog()
+            catalog.migrate_json(os.path.join(settings.PROCESSED_DIR, "documents.json"))
+        self.catalog = catalog
+
+    async def process_upload(self, file: MultipartUpload, doc_id: Optional[str] = None) -> Dict:
+        """Process uploaded file, replacing the document when doc_id is given"""
+        doc_metadata = await self.prepare_upload(file, doc_id=doc_id)
+        self.commit_upload(doc_metadata)
+        return doc_metadata
+
+    async def prepare_upload(self, file: MultipartUpload, doc_id: Optional[str] = None) -> Dict:
+        """Save, OCR and chunk an upload without adding it to the catalog"""
         # Generate unique document ID
-        doc_id = f"doc_{uuid.uuid4().hex[:12]}"
+        replacing = doc_id is not None
+        doc_id = doc_id or f"doc_{uuid.uuid4().hex[:12]}"
 
-        # Save uploaded file
-        file_ext = Path(file.filename).suffix.lower()
-        saved_path = os.path.join(settings.UPLOAD_DIR, f"{doc_id}{file_ext}")
+        # The body is only read once a slot is free, so waiting uploads hold no disk or memory
+        async with _get_upload_slots():
+            with IN_FLIGHT.track("upload"):
+                with timed('upload_write'):
+                    await file.start()
 
-        async with aiofiles.open(saved_path, 'wb') as f:
-            content = await file.read()
-            await f.write(content)
+                    # Save uploaded file; a replacement is staged under its own name so the
+                    # current file stays intact until commit_upload swaps it in
+                    file_ext = Path(file.filename).suffix.lower()
+                    saved_path = os.path.join(settings.UPLOAD_DIR, f"{doc_id}{file_ext}")
+                    staged_path = None
+                    if replacing:
+                        staged_path = os.path.join(settings.UPLOAD_DIR,
+                                                   f"{doc_id}.staged-{uuid.uuid4().hex[:8]}{file_ext}")
+                    content_hash = await self._stream_to_disk(file, staged_path or saved_path)
 
-        # Process document (OCR + chunking)
-        text_content = self.ocr.process_document(saved_path)
+                # Process document (OCR + chunking) off the event loop
+                try:
+                    text_content = await run_in_threadpool(self.ocr.process_document, staged_path or saved_path)
+                except BaseException:
+                    if staged_path:
+                        self._remove_file(staged_path)
+                    raise
 
         # Chunk text
-        chunks = chunk_text(text_content, chunk_size=512, overlap=50)
+        with timed('chunking'):
+            chunks = chunk_text(text_content, chunk_size=512, overlap=50)
 
         # Store metadata
         doc_metadata = {
             'doc_id': doc_id,
             'filename': file.filename,
             'file_path': saved_path,
+            'staged_path': staged_path,
             'pages': len(text_content.get('pages', [])),
+            'content_hash': content_hash,
+            'created_at': time.time(),
             'chunks': chunks
         }
 
-        self.documents[doc_id] = doc_metadata
-        self._save_metadata()
-
         return doc_metadata
 
+    def commit_upload(self, doc_metadata: Dict):
+        """Add a prepared upload to the catalog, replacing any document with its doc_id"""
+        previous = self.catalog.get_document(doc_metadata['doc_id'], include_chunks=False)
+
+        self.catalog.add_document(doc_metadata)
+
+        staged_path = doc_metadata.pop('staged_path', None)
+        if staged_path:
+            os.replace(staged_path, doc_metadata['file_path'])
+
+        # A replacement with a different extension leaves the old file behind
+        if previous and previous.get('file_path') and previous['file_path'] != doc_metadata['file_path']:
+            self._remove_file(previous['file_path'])
+
+    def discard_upload(self, doc_metadata: Dict):
+        """Drop a prepared upload that will not be committed"""
+        staged_path = doc_metadata.pop('staged_path', None)
+        if staged_path:
+            self._remove_file(staged_path)
+
+    @staticmethod
+    async def _stream_to_disk(file: MultipartUpload, path: str) -> str:
+        """Copy an upload to disk in fixed-size chunks; returns its SHA-256"""
+        max_bytes = settings.MAX_UPLOAD_SIZE_MB * 1024 * 1024
+        chunk_size = settings.UPLOAD_CHUNK_SIZE_KB * 1024
+        hasher = hashlib.sha256()
+        size = 0
+
+        # Write to a temp file so a rejected upload never replaces an existing one
+        tmp_path = path + ".part"
+        try:
+            async with aiofiles.open(tmp_path, 'wb') as f:
+                while True:
+                    chunk = await file.read(chunk_size)
+                    if not chunk:
+                        break
+
+                    size += len(chunk)
+                    if size > max_bytes:
+                        raise UploadTooLargeError(
+                            f"File exceeds maximum upload size of {settings.MAX_UPLOAD_SIZE_MB}MB"
+                        )
+
+                    hasher.update(chunk)
+                    await f.write(chunk)
+
+            os.replace(tmp_path, path)
+        except BaseException:
+            DocumentIngestion._remove_file(tmp_path)
+            raise
+
+        return hasher.hexdigest()
+
+    def delete_document(self, doc_id: str) -> bool:
+        """Delete a document, its chunks and its uploaded file"""
+        doc = self.catalog.get_document(doc_id, include_chunks=False)
+        if doc is None:
+            return False
+
+        self.catalog.delete_document(doc_id)
+        if doc.get('file_path'):
+            self._remove_file(doc['file_path'])
+        return True
+
+    @staticmethod
+    def _remove_file(path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
     def get_all_documents(self) -> List[Dict]:
         """Get all processed documents"""
-        return list(self.documents.values())
+        return list(self.catalog.iter_documents())
+
+    def iter_documents(self) -> Iterator[Dict]:
+        """Stream processed documents with their chunks, one at a time"""
+        return self.catalog.iter_documents()
+
+    def list_documents(self, cursor: Optional[str] = None, limit: int = 50,
+                       fields: Optional[List[str]] = None,
+                       filename: Optional[str] = None,
+                       include_total: bool = False) -> Tuple[List[Dict], Optional[str], Optional[int]]:
+        """List document-level fields a page at a time, without chunk text.
+
+        The matching-document count is a full scan, so it is only returned
+        for the first page unless include_total asks for it.
+        """
+        docs, next_cursor = self.catalog.list_documents(
+            cursor=cursor, limit=limit, fields=fields, filename=filename
+        )
+        total = self.catalog.count(filename=filename) if include_total or not cursor else None
+        return docs, next_cursor, total
 
-    def get_document(self, doc_id: str) -> Dict:
+    def get_document(self, doc_id: str) -> Optional[Dict]:
         """Get specific document metadata"""
-        return self.documents.get(doc_id)
\ No newline at end of file
+        return self.catalog.get_document(doc_id)
\ No newline at end of file
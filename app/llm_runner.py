@@ -6,7 +6,6 @@
 import os
 import logging
 from typing import Optional
-from groq import Groq
 
 from app.config import settings
 
@@ -27,6 +26,8 @@ class LLMRunner:
                 "GROQ_API_KEY not set. Please set it in .env file or environment variables."
             )
 
+        from groq import Groq
+
         logger.info(f"Initializing Groq API with model: {settings.GROQ_MODEL}")
         self.client = Groq(api_key=settings.GROQ_API_KEY)
         self.use_groq = True
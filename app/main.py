@@ -1,21 +1,29 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException, Depends, Header
+from fastapi import FastAPI, HTTPException, Depends, Header, Query, Request
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse
+from starlette.concurrency import run_in_threadpool
+from starlette.routing import Match
 from fastapi.middleware.cors import CORSMiddleware
 from typing import Optional, List
 import os
 import time
+import asyncio
+import threading
 import logging
 
 from app.config import settings
 from app.models import (
     UploadResponse, BuildIndexResponse, QueryRequest,
-    QueryResponse, DocumentListResponse
+    QueryResponse, DocumentListResponse, DeleteResponse
 )
-from app.ingestion import DocumentIngestion
+from app.collection_manager import Collection, CollectionManager, CollectionNotFoundError
+from app.sharded_retriever import ShardedFAISSRetriever
+from app.ingestion import InvalidUploadError, MultipartUpload, UploadTooLargeError
 from app.embedding import EmbeddingManager
-from app.retriever import FAISSRetriever
+from app.model_server import RemoteEmbeddingManager
 from app.llm_runner import LLMRunner
+from app.reranker import Reranker
+from app import metrics
 from app.utils import setup_logging, verify_api_key
 
 # Setup logging
@@ -38,45 +46,201 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.middleware("http")
+async def reject_oversized_uploads(request: Request, call_next):
+    """Reject uploads by Content-Length before any of the body is read.
+
+    Chunked uploads without a Content-Length are cut off by the size check
+    while they stream to disk.
+    """
+    if request.method in ("POST", "PUT") and (
+            request.url.path == "/upload" or request.url.path.startswith("/documents/")):
+        content_length = request.headers.get("content-length")
+        # Allow 1MB on top of the limit for multipart framing
+        max_bytes = (settings.MAX_UPLOAD_SIZE_MB + 1) * 1024 * 1024
+        if content_length and content_length.isdigit() and int(content_length) > max_bytes:
+            return JSONResponse(
+                status_code=413,
+                content={"detail": f"File exceeds maximum upload size of {settings.MAX_UPLOAD_SIZE_MB}MB"}
+            )
+    return await call_next(request)
+
+
+def _metrics_path(request: Request) -> str:
+    """Route template for metric labels, so per-document paths don't explode cardinality"""
+    route = request.scope.get("route")
+    if route is not None and hasattr(route, "path"):
+        return route.path
+
+    # Requests answered before routing (e.g. oversized uploads) still belong to a route
+    for route in app.routes:
+        if route.matches(request.scope)[0] != Match.NONE and hasattr(route, "path"):
+            return route.path
+
+    # Scanners probing arbitrary URLs would otherwise add a label per path
+    return "<unmatched>"
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Track in-flight requests, count responses and attach the stage breakdown"""
+    timings = metrics.start_request_timings()
+    start = time.perf_counter()
+
+    with metrics.IN_FLIGHT.track("http_request"):
+        response = await call_next(request)
+
+    metrics.REQUESTS_TOTAL.inc(_metrics_path(request), str(response.status_code))
+
+    if settings.TIMING_HEADER_ENABLED:
+        timings["total"] = time.perf_counter() - start
+        response.headers["Server-Timing"] = metrics.format_server_timing(timings)
+
+    return response
+
+
+# Upload endpoints read the multipart body from the request stream themselves, so the schema is declared by hand
+UPLOAD_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["file"],
+                    "properties": {"file": {"type": "string", "format": "binary"}}
+                }
+            }
+        }
+    }
+}
+
 # Mount static files for web UI
 if os.path.exists("webui"):
     app.mount("/static", StaticFiles(directory="webui/static"), name="static")
 
 # Initialize components (lazy loading)
-ingestion = None
+collection_manager = None
 embedding_manager = None
-retriever = None
 llm_runner = None
+reranker = None
+llm_slots = None
+
+# Guards singleton creation so warm-up and the first request never load a model twice
+_init_lock = threading.RLock()
 
+# Component readiness, filled in by the startup warm-up
+readiness = {"embedding": False, "index": False, "reranker": False, "warmup_error": None}
 
-def get_ingestion():
-    global ingestion
-    if ingestion is None:
-        ingestion = DocumentIngestion()
-    return ingestion
+
+def get_collection_manager():
+    global collection_manager
+    if collection_manager is None:
+        with _init_lock:
+            if collection_manager is None:
+                collection_manager = CollectionManager()
+    return collection_manager
+
+
+def get_collection(name: Optional[str] = None, create: bool = False) -> Collection:
+    try:
+        return get_collection_manager().get(name, create=create)
+    except CollectionNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 def get_embedding_manager():
     global embedding_manager
     if embedding_manager is None:
-        embedding_manager = EmbeddingManager()
+        with _init_lock:
+            if embedding_manager is None:
+                if settings.EMBEDDING_SERVER_ADDRESS:
+                    # Multi-worker mode: share one model process instead of loading a copy per worker
+                    embedding_manager = RemoteEmbeddingManager(settings.EMBEDDING_SERVER_ADDRESS)
+                else:
+                    embedding_manager = EmbeddingManager()
     return embedding_manager
 
 
-def get_retriever():
-    global retriever
-    if retriever is None:
-        retriever = FAISSRetriever()
-    return retriever
-
-
 def get_llm_runner():
     global llm_runner
     if llm_runner is None:
-        llm_runner = LLMRunner()
+        with _init_lock:
+            if llm_runner is None:
+                llm_runner = LLMRunner()
     return llm_runner
 
 
+def get_reranker():
+    global reranker
+    if reranker is None:
+        with _init_lock:
+            if reranker is None:
+                reranker = Reranker()
+    return reranker
+
+
+def get_llm_slots():
+    global llm_slots
+    if llm_slots is None:
+        llm_slots = asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY)
+    return llm_slots
+
+
+def _collect_index_metrics():
+    """Refresh index gauges from the collections currently loaded"""
+    metrics.INDEX_VECTORS.clear()
+    metrics.INDEX_TOMBSTONES.clear()
+
+    if collection_manager is None:
+        return
+
+    for col in collection_manager.open_collections():
+        ret = col.loaded_retriever()
+        if ret is not None and ret.has_index():
+            metrics.INDEX_VECTORS.set(ret.ntotal, col.name)
+            metrics.INDEX_TOMBSTONES.set(ret.num_tombstones, col.name)
+
+
+metrics.register_collector(_collect_index_metrics)
+
+
+def warm_up():
+    """Load and exercise the embedding model, default index and reranker"""
+    start = time.time()
+
+    try:
+        embed_mgr = get_embedding_manager()
+        query_embedding = embed_mgr.generate_embeddings(["warm up"])[0]
+        readiness["embedding"] = True
+
+        ret = get_collection().retriever
+        if ret.ntotal > 0:
+            ret.search(query_embedding, top_k=1)
+        readiness["index"] = True
+
+        if settings.RERANK_ENABLED:
+            get_reranker().rerank("warm up", query_embedding, [{'text': "warm up"}], top_k=1)
+        readiness["reranker"] = True
+
+        logger.info(f"Warm-up finished in {time.time() - start:.2f}s")
+    except Exception as e:
+        readiness["warmup_error"] = str(e)
+        logger.error(f"Warm-up failed: {e}")
+
+
+@app.on_event("startup")
+async def start_warm_up():
+    """Warm up in the background so the server accepts health checks immediately"""
+    if settings.WARMUP_ON_STARTUP:
+        threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+    else:
+        readiness.update(embedding=True, index=True, reranker=True)
+
+
 @app.get("/", response_class=HTMLResponse)
 async def root():
     """Serve the web UI"""
@@ -87,23 +251,26 @@ async def root():
         return HTMLResponse(content="<h1>Edge RAG MVP</h1><p>API is running. Access /docs for API documentation.</p>")
 
 
-@app.post("/upload", response_model=UploadResponse)
+@app.post("/upload", response_model=UploadResponse, openapi_extra=UPLOAD_REQUEST_BODY)
 async def upload_document(
-        file: UploadFile = File(...),
+        request: Request,
+        collection: Optional[str] = Query(None, description="Collection name (default collection if omitted)"),
         x_api_key: str = Header(..., alias="X-API-Key")
 ):
     """Upload a PDF or image document"""
     verify_api_key(x_api_key)
 
     start_time = time.time()
-    logger.info(f"Uploading document: {file.filename}")
+    col = get_collection(collection, create=True)
+    logger.info(f"Uploading document (collection={col.name})")
 
     try:
-        ingest = get_ingestion()
-        result = await ingest.process_upload(file)
+        ingest = col.ingestion
+        result = await ingest.process_upload(MultipartUpload(request))
 
         processing_time = time.time() - start_time
-        logger.info(f"Document uploaded successfully: {result['doc_id']} in {processing_time:.2f}s")
+        logger.info(f"Document uploaded successfully: {result['doc_id']} ({result['filename']}) "
+                    f"in {processing_time:.2f}s")
 
         return UploadResponse(
             doc_id=result['doc_id'],
@@ -112,34 +279,48 @@ async def upload_document(
             status="uploaded",
             processing_time_seconds=processing_time
         )
+    except InvalidUploadError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         logger.error(f"Upload failed: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
 
 @app.post("/build-index", response_model=BuildIndexResponse)
-async def build_index(x_api_key: str = Header(..., alias="X-API-Key")):
+async def build_index(
+        collection: Optional[str] = Query(None, description="Collection name (default collection if omitted)"),
+        shard: Optional[int] = Query(None, ge=0, description="Rebuild only this shard of a sharded index"),
+        x_api_key: str = Header(..., alias="X-API-Key")
+):
     """Build embeddings and FAISS index for all uploaded documents"""
     verify_api_key(x_api_key)
 
     start_time = time.time()
-    logger.info("Building index...")
+    col = get_collection(collection, create=True)
+    shard_note = f" (shard {shard})" if shard is not None else ""
+    logger.info(f"Building index for collection {col.name}{shard_note}...")
+
+    ret = col.retriever
+    if shard is not None and (not isinstance(ret, ShardedFAISSRetriever) or shard >= ret.num_shards):
+        raise HTTPException(status_code=400, detail=f"Shard {shard} does not exist in collection {col.name}")
 
     try:
-        ingest = get_ingestion()
+        ingest = col.ingestion
         embed_mgr = get_embedding_manager()
-        ret = get_retriever()
-
-        # Get all processed documents
-        docs = ingest.get_all_documents()
-        if not docs:
-            raise HTTPException(status_code=400, detail="No documents to index")
 
         # Extract chunks and generate embeddings
         all_chunks = []
         all_metadata = []
+        documents_indexed = 0
+
+        for doc in ingest.iter_documents():
+            # A single-shard rebuild only embeds the documents routed to that shard
+            if shard is not None and ret.shard_for(doc['doc_id']) != shard:
+                continue
 
-        for doc in docs:
+            documents_indexed += 1
             chunks = doc.get('chunks', [])
             for idx, chunk in enumerate(chunks):
                 all_chunks.append(chunk['text'])
@@ -150,12 +331,18 @@ async def build_index(x_api_key: str = Header(..., alias="X-API-Key")):
                     'chunk_id': idx
                 })
 
+        if documents_indexed == 0:
+            raise HTTPException(status_code=400, detail="No documents to index")
+
         logger.info(f"Generating embeddings for {len(all_chunks)} chunks...")
         embeddings = embed_mgr.generate_embeddings(all_chunks)
 
         # Build FAISS index
         logger.info("Building FAISS index...")
-        ret.build_index(embeddings, all_metadata)
+        if shard is not None:
+            ret.build_shard(shard, embeddings, all_metadata)
+        else:
+            ret.build_index(embeddings, all_metadata)
 
         processing_time = time.time() - start_time
         index_size = ret.get_index_size_mb()
@@ -164,11 +351,13 @@ async def build_index(x_api_key: str = Header(..., alias="X-API-Key")):
 
         return BuildIndexResponse(
             status="success",
-            documents_indexed=len(docs),
+            documents_indexed=documents_indexed,
             total_chunks=len(all_chunks),
             embedding_time_seconds=processing_time,
             index_size_mb=index_size
         )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Index building failed: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Index building failed: {str(e)}")
@@ -185,45 +374,79 @@ async def query(
     start_time = time.time()
     logger.info(f"Query: {request.query}")
 
+    col = get_collection(request.collection)
+
     try:
         embed_mgr = get_embedding_manager()
-        ret = get_retriever()
+        ret = col.retriever
         llm = get_llm_runner()
 
         # Generate query embedding
-        query_embedding = embed_mgr.generate_embeddings([request.query])[0]
+        embedding_start = time.time()
+        with metrics.timed('query_embedding'):
+            query_embedding = embed_mgr.generate_embeddings([request.query])[0]
+        embedding_time = (time.time() - embedding_start) * 1000
 
-        # Retrieve relevant chunks
+        use_rerank = settings.RERANK_ENABLED if request.rerank is None else request.rerank
+        use_mmr = settings.MMR_ENABLED if request.mmr is None else request.mmr
+        second_stage = use_rerank or use_mmr
+
+        # Retrieve relevant chunks (over-fetch candidates when a second stage runs)
         retrieval_start = time.time()
-        results = ret.search(query_embedding, top_k=request.top_k)
+        fetch_k = Reranker.candidate_count(request.top_k) if second_stage else request.top_k
+        results = ret.search(query_embedding, top_k=fetch_k, include_embeddings=use_mmr)
         retrieval_time = (time.time() - retrieval_start) * 1000
 
+        # Rerank and/or diversify candidates
+        rerank_time = 0.0
+        if second_stage:
+            rerank_start = time.time()
+            # The cross-encoder runs for tens to hundreds of ms; keep it off the event loop
+            with metrics.timed('rerank'):
+                results = await run_in_threadpool(
+                    get_reranker().rerank, request.query, query_embedding, results, request.top_k,
+                    use_cross_encoder=use_rerank, use_mmr=use_mmr
+                )
+            rerank_time = (time.time() - rerank_start) * 1000
+            logger.info(f"Reranked {fetch_k} candidates in {rerank_time:.0f}ms "
+                        f"(cross_encoder={use_rerank}, mmr={use_mmr})")
+
         # Prepare context for LLM
         context_parts = []
         sources = []
 
-        for result in results:
-            chunk_text = result['text']
-            metadata = result['metadata']
-            score = result['score']
-
-            context_parts.append(f"[Source: {metadata['filename']}, Page {metadata['page']}]\n{chunk_text}")
+        with metrics.timed('context_build'):
+            for result in results:
+                chunk_text = result['text']
+                metadata = result['metadata']
+                score = result['score']
+
+                context_parts.append(f"[Source: {metadata['filename']}, Page {metadata['page']}]\n{chunk_text}")
+
+                sources.append({
+                    'doc_id': metadata['doc_id'],
+                    'filename': metadata['filename'],
+                    'page': metadata['page'],
+                    'chunk_id': metadata['chunk_id'],
+                    'score': float(score),
+                    'text': chunk_text[:200] + "..." if len(chunk_text) > 200 else chunk_text
+                })
 
-            sources.append({
-                'doc_id': metadata['doc_id'],
-                'filename': metadata['filename'],
-                'page': metadata['page'],
-                'chunk_id': metadata['chunk_id'],
-                'score': float(score),
-                'text': chunk_text[:200] + "..." if len(chunk_text) > 200 else chunk_text
-            })
+            context = "\n\n".join(context_parts)
 
-        context = "\n\n".join(context_parts)
+        # Generate answer with LLM; waits for a free slot when LLM_MAX_CONCURRENCY are running
+        queue_start = time.perf_counter()
+        with metrics.IN_FLIGHT.track("llm_queued"):
+            await get_llm_slots().acquire()
+        metrics.observe_stage('llm_queue', time.perf_counter() - queue_start)
 
-        # Generate answer with LLM
-        generation_start = time.time()
-        answer = llm.generate_answer(request.query, context)
-        generation_time = (time.time() - generation_start) * 1000
+        try:
+            generation_start = time.time()
+            with metrics.IN_FLIGHT.track("llm_generation"), metrics.timed('llm_generation'):
+                answer = await run_in_threadpool(llm.generate_answer, request.query, context)
+            generation_time = (time.time() - generation_start) * 1000
+        finally:
+            get_llm_slots().release()
 
         total_latency = (time.time() - start_time) * 1000
 
@@ -234,8 +457,10 @@ async def query(
             answer=answer,
             sources=sources,
             latency_ms=int(total_latency),
+            embedding_time_ms=int(embedding_time),
             retrieval_time_ms=int(retrieval_time),
-            generation_time_ms=int(generation_time)
+            generation_time_ms=int(generation_time),
+            rerank_time_ms=int(rerank_time)
         )
     except Exception as e:
         logger.error(f"Query failed: {str(e)}")
@@ -243,24 +468,172 @@ async def query(
 
 
 @app.get("/docs-list", response_model=DocumentListResponse)
-async def list_documents(x_api_key: str = Header(..., alias="X-API-Key")):
-    """List all uploaded documents"""
+async def list_documents(
+        cursor: Optional[str] = None,
+        limit: int = Query(50, ge=1, le=500),
+        fields: Optional[str] = Query(None, description="Comma-separated document fields to return"),
+        filename: Optional[str] = Query(None, description="Filter by filename substring"),
+        include_total: bool = Query(False, description="Count matching documents on pages after the first"),
+        collection: Optional[str] = Query(None, description="Collection name (default collection if omitted)"),
+        x_api_key: str = Header(..., alias="X-API-Key")
+):
+    """List uploaded documents a page at a time (chunk text is not included)"""
     verify_api_key(x_api_key)
 
+    field_list = [f.strip() for f in fields.split(',') if f.strip()] if fields else None
+    col = get_collection(collection)
+
     try:
-        ingest = get_ingestion()
-        docs = ingest.get_all_documents()
+        ingest = col.ingestion
+        docs, next_cursor, total = ingest.list_documents(
+            cursor=cursor, limit=limit, fields=field_list, filename=filename,
+            include_total=include_total
+        )
 
         return DocumentListResponse(
-            total=len(docs),
-            documents=docs
+            total=total,
+            documents=docs,
+            next_cursor=next_cursor
         )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Listing documents failed: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Listing documents failed: {str(e)}")
 
 
+@app.delete("/documents/{doc_id}", response_model=DeleteResponse)
+async def delete_document(
+        doc_id: str,
+        collection: Optional[str] = Query(None, description="Collection name (default collection if omitted)"),
+        x_api_key: str = Header(..., alias="X-API-Key")
+):
+    """Delete a document; its vectors are tombstoned and disappear from search immediately"""
+    verify_api_key(x_api_key)
+
+    col = get_collection(collection)
+
+    try:
+        ingest = col.ingestion
+        if ingest.get_document(doc_id) is None:
+            raise HTTPException(status_code=404, detail=f"Document not found: {doc_id}")
+
+        tombstoned = col.retriever.tombstone_document(doc_id)
+        ingest.delete_document(doc_id)
+
+        logger.info(f"Deleted document {doc_id} ({tombstoned} vectors tombstoned)")
+
+        return DeleteResponse(doc_id=doc_id, status="deleted", vectors_tombstoned=tombstoned)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Delete failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Delete failed: {str(e)}")
+
+
+@app.put("/documents/{doc_id}", response_model=UploadResponse, openapi_extra=UPLOAD_REQUEST_BODY)
+async def replace_document(
+        doc_id: str,
+        request: Request,
+        collection: Optional[str] = Query(None, description="Collection name (default collection if omitted)"),
+        x_api_key: str = Header(..., alias="X-API-Key")
+):
+    """Replace a document's content, re-indexing it in place when an index exists"""
+    verify_api_key(x_api_key)
+
+    start_time = time.time()
+    col = get_collection(collection)
+    logger.info(f"Replacing document {doc_id} (collection={col.name})")
+
+    try:
+        ingest = col.ingestion
+        if ingest.get_document(doc_id) is None:
+            raise HTTPException(status_code=404, detail=f"Document not found: {doc_id}")
+
+        result = await ingest.prepare_upload(MultipartUpload(request), doc_id=doc_id)
+
+        ret = col.retriever
+        embeddings = None
+        try:
+            if ret.has_index() and result['chunks']:
+                embeddings = get_embedding_manager().generate_embeddings([c['text'] for c in result['chunks']])
+
+            # Vectors resolve their text by (doc_id, chunk_id), so the old ones are hidden
+            # before the new chunks take over those keys in the catalog
+            ret.tombstone_document(doc_id)
+            ingest.commit_upload(result)
+        except BaseException:
+            # The current file is untouched until commit; only the staged copy is dropped
+            ingest.discard_upload(result)
+            raise
+
+        vectors_indexed = 0
+        if embeddings is not None:
+            ret.add_vectors(embeddings, [
+                {
+                    'doc_id': doc_id,
+                    'filename': result['filename'],
+                    'page': chunk.get('page', 0),
+                    'chunk_id': idx
+                }
+                for idx, chunk in enumerate(result['chunks'])
+            ])
+            vectors_indexed = len(embeddings)
+
+        processing_time = time.time() - start_time
+        logger.info(f"Document {doc_id} replaced in {processing_time:.2f}s")
+
+        return UploadResponse(
+            doc_id=doc_id,
+            filename=result['filename'],
+            pages=result.get('pages', 0),
+            status="replaced",
+            processing_time_seconds=processing_time,
+            vectors_indexed=vectors_indexed
+        )
+    except HTTPException:
+        raise
+    except InvalidUploadError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except Exception as e:
+        logger.error(f"Replace failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Replace failed: {str(e)}")
+
+
+@app.get("/collections")
+async def list_collections(x_api_key: str = Header(..., alias="X-API-Key")):
+    """List collections on disk and which of them are currently loaded"""
+    verify_api_key(x_api_key)
+
+    manager = get_collection_manager()
+    return {
+        "collections": manager.list_names(),
+        "loaded": manager.open_names()
+    }
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Prometheus text-format metrics for this process"""
+    return PlainTextResponse(metrics.render_metrics(), media_type="text/plain; version=0.0.4")
+
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
-    return {"status": "healthy", "version": "1.0.0"}
\ No newline at end of file
+    return {"status": "healthy", "version": "1.0.0"}
+
+
+@app.get("/ready")
+async def readiness_check():
+    """Readiness probe: 200 once models and the default index are loaded and warm"""
+    components = {k: v for k, v in readiness.items() if k != "warmup_error"}
+    ready = all(components.values())
+
+    body = {"status": "ready" if ready else "starting", "components": components}
+    if readiness["warmup_error"]:
+        body["error"] = readiness["warmup_error"]
+
+    return JSONResponse(status_code=200 if ready else 503, content=body)
\ No newline at end of file
@@ -0,0 +1,204 @@
+import os
+import time
+import bisect
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Per-request stage timings (stage -> seconds), set by the HTTP middleware
+_request_timings: contextvars.ContextVar[Optional[Dict[str, float]]] = contextvars.ContextVar(
+    'request_timings', default=None
+)
+
+
+def _format_labels(labelnames: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {value}")
+        return lines
+
+
+class Gauge:
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def set(self, value: float, *labels: str):
+        with self._lock:
+            self._values[labels] = value
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def dec(self, *labels: str, amount: float = 1.0):
+        self.inc(*labels, amount=-amount)
+
+    @contextmanager
+    def track(self, *labels: str) -> Iterator[None]:
+        """Increment while the block runs"""
+        self.inc(*labels)
+        try:
+            yield
+        finally:
+            self.dec(*labels)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} gauge"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (+Inf last), sum, count]
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str):
+        position = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][position] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for labels, (counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                    cumulative += bucket_count
+                    le = "+Inf" if bound == float('inf') else repr(bound)
+                    bucket_labels = _format_labels(self.labelnames, labels, f'le="{le}"')
+                    lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {total}")
+                lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+STAGE_SECONDS = Histogram(
+    "edgerag_stage_duration_seconds", "Duration of pipeline stages", labelnames=("stage",)
+)
+REQUESTS_TOTAL = Counter(
+    "edgerag_http_requests_total", "HTTP requests handled", labelnames=("path", "status")
+)
+IN_FLIGHT = Gauge(
+    "edgerag_in_flight", "Operations currently in progress", labelnames=("operation",)
+)
+INDEX_VECTORS = Gauge(
+    "edgerag_index_vectors", "Vectors in loaded indexes", labelnames=("collection",)
+)
+INDEX_TOMBSTONES = Gauge(
+    "edgerag_index_tombstones", "Tombstoned vectors in loaded indexes", labelnames=("collection",)
+)
+PROCESS_RSS_BYTES = Gauge("edgerag_process_resident_memory_bytes", "Resident memory of this process")
+
+_METRICS = [STAGE_SECONDS, REQUESTS_TOTAL, IN_FLIGHT, INDEX_VECTORS, INDEX_TOMBSTONES, PROCESS_RSS_BYTES]
+
+# Callbacks refreshing gauges right before rendering
+_collectors: List[Callable[[], None]] = []
+
+
+def observe_stage(stage: str, seconds: float):
+    """Record a stage duration in the histogram and the current request's breakdown"""
+    STAGE_SECONDS.observe(seconds, stage)
+
+    timings = _request_timings.get()
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + seconds
+
+
+@contextmanager
+def timed(stage: str) -> Iterator[None]:
+    """Time the enclosed block as a pipeline stage"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage, time.perf_counter() - start)
+
+
+def start_request_timings() -> Dict[str, float]:
+    """Begin collecting a stage breakdown for the current request"""
+    timings: Dict[str, float] = {}
+    _request_timings.set(timings)
+    return timings
+
+
+def format_server_timing(timings: Dict[str, float]) -> str:
+    """Format a stage breakdown as a Server-Timing header value (milliseconds)"""
+    return ", ".join(f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in timings.items())
+
+
+def register_collector(collector: Callable[[], None]):
+    _collectors.append(collector)
+
+
+def _resident_memory_bytes() -> float:
+    try:
+        with open("/proc/self/statm", 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        import resource
+        # ru_maxrss is the peak in KB on Linux; best available without /proc
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def render_metrics() -> str:
+    """Render all metrics in the Prometheus text exposition format"""
+    PROCESS_RSS_BYTES.set(_resident_memory_bytes())
+
+    for collector in _collectors:
+        try:
+            collector()
+        except Exception as e:
+            logger.warning(f"Metrics collector failed: {e}")
+
+    lines = []
+    for metric in _METRICS:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
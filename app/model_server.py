@@ -0,0 +1,150 @@
+"""Shared embedding model process for multi-worker serving.
+
+One process loads the SentenceTransformer and serves embedding requests
+over a local Unix socket. API workers use RemoteEmbeddingManager in place
+of EmbeddingManager, so the model is in memory once however many workers
+run. Requests arriving together are coalesced into a single encode call.
+"""
+
+import os
+import queue
+import threading
+from multiprocessing.connection import Client, Connection, Listener
+from typing import List
+import numpy as np
+import logging
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def connection_authkey() -> bytes:
+    # Workers and the model server share the API key as the connection secret
+    return settings.API_KEY.encode()
+
+
+class EmbeddingServer:
+    def __init__(self, address: str):
+        from app.embedding import EmbeddingManager
+
+        self.address = address
+        self.manager = EmbeddingManager()
+        self._requests = queue.Queue()
+
+    def serve_forever(self):
+        """Accept worker connections; the socket only appears once the model is loaded"""
+        if os.path.exists(self.address):
+            os.remove(self.address)  # Stale socket from a previous run
+
+        threading.Thread(target=self._batch_loop, name="embedding-batcher", daemon=True).start()
+
+        with Listener(self.address, family='AF_UNIX', authkey=connection_authkey()) as listener:
+            os.chmod(self.address, 0o600)
+            logger.info(f"Embedding server listening on {self.address}")
+
+            while True:
+                try:
+                    conn = listener.accept()
+                except Exception as e:
+                    logger.warning(f"Rejected embedding client: {e}")
+                    continue
+                threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def _handle(self, conn: Connection):
+        with conn:
+            while True:
+                try:
+                    op, payload = conn.recv()
+                except (EOFError, OSError):
+                    break
+
+                if op == 'dim':
+                    conn.send(('ok', self.manager.embedding_dim))
+                elif op == 'embed':
+                    conn.send(self._embed(payload))
+                else:
+                    conn.send(('error', f"Unknown operation: {op}"))
+
+    def _embed(self, texts: List[str]):
+        """Queue a request one batch at a time, so queries from other workers
+        are encoded between the slices of a large /build-index request"""
+        batch_size = settings.EMBEDDING_BATCH_SIZE
+        parts = []
+        for start in range(0, max(len(texts), 1), batch_size):
+            reply = queue.Queue(maxsize=1)
+            self._requests.put((texts[start:start + batch_size], reply))
+            status, result = reply.get()
+            if status != 'ok':
+                return status, result
+            parts.append(result)
+
+        return 'ok', parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    def _batch_loop(self):
+        """Encode queued requests, merging those that arrived together into one batch"""
+        while True:
+            batch = [self._requests.get()]
+            size = len(batch[0][0])
+            while size < settings.EMBEDDING_BATCH_SIZE:
+                try:
+                    request = self._requests.get_nowait()
+                except queue.Empty:
+                    break
+                batch.append(request)
+                size += len(request[0])
+
+            texts = [text for request_texts, _ in batch for text in request_texts]
+            try:
+                embeddings = self.manager.generate_embeddings(texts)
+            except Exception as e:
+                logger.error(f"Embedding failed: {e}")
+                for _, reply in batch:
+                    reply.put(('error', str(e)))
+                continue
+
+            offset = 0
+            for request_texts, reply in batch:
+                reply.put(('ok', embeddings[offset:offset + len(request_texts)]))
+                offset += len(request_texts)
+
+
+class RemoteEmbeddingManager:
+    """Drop-in replacement for EmbeddingManager backed by the shared model process"""
+
+    def __init__(self, address: str):
+        self.address = address
+        self._local = threading.local()
+        self.embedding_dim = self._call('dim')
+
+    def _connection(self) -> Connection:
+        # Connections are not thread-safe; each threadpool thread keeps its own
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = Client(self.address, family='AF_UNIX', authkey=connection_authkey())
+            self._local.conn = conn
+        return conn
+
+    def _call(self, op: str, payload=None):
+        for attempt in range(2):
+            conn = self._connection()
+            try:
+                conn.send((op, payload))
+                status, result = conn.recv()
+                break
+            except (EOFError, OSError):
+                # Model server restarted; reconnect once
+                self._local.conn = None
+                conn.close()
+                if attempt:
+                    raise
+
+        if status != 'ok':
+            raise RuntimeError(f"Embedding server error: {result}")
+        return result
+
+    def generate_embeddings(self, texts: List[str]) -> np.ndarray:
+        """Generate embeddings for a list of texts"""
+        if not texts:
+            return np.array([])
+        return self._call('embed', list(texts))
@@ -8,6 +8,13 @@ class UploadResponse(BaseModel):
     pages: int
     status: str
     processing_time_seconds: float
+    vectors_indexed: int = 0
+
+
+class DeleteResponse(BaseModel):
+    doc_id: str
+    status: str
+    vectors_tombstoned: int
 
 
 class BuildIndexResponse(BaseModel):
@@ -21,6 +28,9 @@ class BuildIndexResponse(BaseModel):
 class QueryRequest(BaseModel):
     query: str = Field(..., min_length=1)
     top_k: int = Field(5, ge=1, le=20)
+    rerank: Optional[bool] = None  # Defaults to settings.RERANK_ENABLED
+    mmr: Optional[bool] = None  # Defaults to settings.MMR_ENABLED
+    collection: Optional[str] = None  # Defaults to settings.DEFAULT_COLLECTION
 
 
 class SourceReference(BaseModel):
@@ -37,10 +47,13 @@ class QueryResponse(BaseModel):
     answer: str
     sources: List[SourceReference]
     latency_ms: int
+    embedding_time_ms: int = 0
     retrieval_time_ms: int
     generation_time_ms: int
+    rerank_time_ms: int = 0
 
 
 class DocumentListResponse(BaseModel):
-    total: int
-    documents: List[Dict[str, Any]]
\ No newline at end of file
+    total: Optional[int] = None  # Only on the first page unless include_total is set
+    documents: List[Dict[str, Any]]
+    next_cursor: Optional[str] = None
\ No newline at end of file
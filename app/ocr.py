@@ -1,18 +1,39 @@
 import os
+import hashlib
+import statistics
 from pathlib import Path
-from typing import Dict, List
-import pdfplumber
-from PIL import Image
-import pytesseract
-from pdf2image import convert_from_path
+from typing import Callable, Dict, List, Optional, Tuple
+from PIL import Image, ImageFilter, ImageOps
 import logging
 
+from app.config import settings
+from app.metrics import timed
+
 logger = logging.getLogger(__name__)
 
+# Pages with less extractable text than this are treated as having no text layer
+MIN_TEXT_LAYER_CHARS = 50
+
+# Pages whose images cover at least this fraction of the page are OCR'd in addition to the text layer
+MIXED_IMAGE_COVERAGE = 0.5
+
+# Resolution of the legacy OCR path; used when the probe render reads nothing confidently
+FALLBACK_OCR_DPI = 300
+
+# Bump when cached OCR output from earlier versions must not be reused
+OCR_CACHE_VERSION = 2
+
 
 class OCRProcessor:
     def __init__(self):
         self.supported_formats = {'.pdf', '.png', '.jpg', '.jpeg', '.tiff', '.bmp'}
+        self.adaptive = settings.OCR_MODE == "adaptive"
+
+        # Bytes in OCR_CACHE_DIR, scanned on the first write and tracked from there
+        self._cache_bytes = None
+
+        if self.adaptive:
+            os.makedirs(settings.OCR_CACHE_DIR, exist_ok=True)
 
     def process_document(self, file_path: str) -> Dict:
         """Process document and extract text"""
@@ -28,18 +49,24 @@ class OCRProcessor:
 
     def _process_pdf(self, pdf_path: str) -> Dict:
         """Extract text from PDF using pdfplumber and OCR fallback"""
+        # PDF/OCR libraries are imported on first use to keep app startup fast
+        import pdfplumber
+
         pages_data = []
 
         try:
             # Try text extraction with pdfplumber first
             with pdfplumber.open(pdf_path) as pdf:
                 for page_num, page in enumerate(pdf.pages, 1):
-                    text = page.extract_text()
+                    with timed('ocr_page'):
+                        text = page.extract_text()
 
-                    # If no text found, use OCR
-                    if not text or len(text.strip()) < 50:
-                        logger.info(f"Using OCR for page {page_num}")
-                        text = self._ocr_pdf_page(pdf_path, page_num)
+                        if self.adaptive:
+                            text = self._process_pdf_page_adaptive(pdf_path, page_num, page, text)
+                        # If no text found, use OCR
+                        elif not text or len(text.strip()) < MIN_TEXT_LAYER_CHARS:
+                            logger.info(f"Using OCR for page {page_num}")
+                            text = self._ocr_pdf_page(pdf_path, page_num)
 
                     pages_data.append({
                         'page': page_num,
@@ -53,14 +80,256 @@ class OCRProcessor:
             # Fallback to full OCR
             return self._ocr_full_pdf(pdf_path)
 
+    def _process_pdf_page_adaptive(self, pdf_path: str, page_num: int, page, text: Optional[str]) -> str:
+        """Extract one page according to its classification"""
+        page_type = self._classify_page(page, text)
+
+        if page_type == 'text':
+            return text
+
+        render = self._pdf_page_renderer(pdf_path, page_num)
+
+        try:
+            if page_type == 'scanned':
+                logger.info(f"Page {page_num} classified as scanned, using adaptive OCR")
+                return self._adaptive_ocr(render, cache_tag='page')
+
+            # Mixed page: keep the text layer and OCR only the embedded images
+            logger.info(f"Page {page_num} classified as mixed, OCR'ing image regions")
+            image_text = self._ocr_image_regions(render, page)
+            return f"{text}\n{image_text}" if image_text.strip() else text
+        except Exception as e:
+            logger.error(f"OCR failed for page {page_num}: {e}")
+            return text or ""
+
+    @staticmethod
+    def _classify_page(page, text: Optional[str]) -> str:
+        """Classify a PDF page as 'text', 'scanned' or 'mixed'"""
+        if not text or len(text.strip()) < MIN_TEXT_LAYER_CHARS:
+            return 'scanned'
+
+        page_area = float(page.width * page.height) or 1.0
+        image_area = sum(
+            max(img['x1'] - img['x0'], 0) * max(img['bottom'] - img['top'], 0)
+            for img in page.images
+        )
+
+        return 'mixed' if image_area / page_area >= MIXED_IMAGE_COVERAGE else 'text'
+
+    @staticmethod
+    def _pdf_page_renderer(pdf_path: str, page_num: int) -> Callable[[int], Image.Image]:
+        """Return a function rasterizing a single PDF page at a given DPI"""
+        def render(dpi: int) -> Image.Image:
+            from pdf2image import convert_from_path
+
+            images = convert_from_path(
+                pdf_path,
+                first_page=page_num,
+                last_page=page_num,
+                dpi=dpi,
+                grayscale=True
+            )
+            if not images:
+                raise ValueError(f"Could not rasterize page {page_num}")
+            return images[0]
+
+        return render
+
+    def _adaptive_ocr(self, render: Callable[[int], Image.Image], cache_tag: str) -> str:
+        """OCR at a low probe DPI, re-rendering higher only when the text is too small.
+
+        The probe render doubles as the cache key, so pages already seen are
+        skipped before any OCR runs.
+        """
+        import pytesseract
+
+        probe_dpi = settings.OCR_MIN_DPI
+        probe = render(probe_dpi)
+
+        cache_key = self._cache_key(probe, cache_tag)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
+
+        data = pytesseract.image_to_data(self._preprocess(probe, probe_dpi), output_type=pytesseract.Output.DICT)
+        text = self._text_from_data(data)
+        text_height = self._median_text_height(data)
+
+        # Re-render at the DPI that brings text to the target height (tesseract is most accurate there);
+        # a probe with no confident words is too coarse to measure, so fall back to the legacy resolution
+        if text_height is None:
+            dpi = min(max(FALLBACK_OCR_DPI, probe_dpi), settings.OCR_MAX_DPI)
+        elif text_height < settings.OCR_TARGET_TEXT_HEIGHT_PX * 0.75:
+            dpi = int(probe_dpi * settings.OCR_TARGET_TEXT_HEIGHT_PX / text_height)
+            dpi = min(max(dpi, probe_dpi), settings.OCR_MAX_DPI)
+        else:
+            dpi = probe_dpi
+
+        if dpi > probe_dpi:
+            if text_height is None:
+                logger.info(f"No confident text at {probe_dpi} DPI, re-rendering at {dpi} DPI")
+            else:
+                logger.info(f"Small text ({text_height:.0f}px at {probe_dpi} DPI), re-rendering at {dpi} DPI")
+            image = render(dpi)
+            text = pytesseract.image_to_string(self._preprocess(image, dpi))
+
+        self._cache_put(cache_key, text)
+        return text
+
+    def _ocr_image_regions(self, render: Callable[[int], Image.Image], page) -> str:
+        """OCR only the image regions of a mixed page"""
+        dpi = settings.OCR_MIN_DPI
+        image = render(dpi)
+        scale = dpi / 72.0
+
+        texts = []
+        for img in page.images:
+            box = (
+                int(max(img['x0'], 0) * scale),
+                int(max(img['top'], 0) * scale),
+                int(min(img['x1'], page.width) * scale),
+                int(min(img['bottom'], page.height) * scale)
+            )
+            if box[2] - box[0] < 32 or box[3] - box[1] < 32:
+                continue
+
+            region = image.crop(box)
+            texts.append(self._adaptive_ocr(self._scaled_renderer(region, dpi), cache_tag='region'))
+
+        return "\n".join(t for t in texts if t.strip())
+
+    @staticmethod
+    def _scaled_renderer(image: Image.Image, base_dpi: int) -> Callable[[int], Image.Image]:
+        """Emulate re-rendering an already rasterized image by resampling it"""
+        def render(dpi: int) -> Image.Image:
+            if dpi == base_dpi:
+                return image
+            factor = dpi / base_dpi
+            return image.resize((int(image.width * factor), int(image.height * factor)), Image.LANCZOS)
+
+        return render
+
+    @staticmethod
+    def _preprocess(image: Image.Image, dpi: int) -> Image.Image:
+        """Grayscale and stretch contrast; denoise when upsampling amplifies scan noise"""
+        image = ImageOps.autocontrast(ImageOps.grayscale(image))
+        if dpi > 300:
+            image = image.filter(ImageFilter.MedianFilter(3))
+        return image
+
+    @staticmethod
+    def _text_from_data(data: Dict) -> str:
+        """Rebuild plain text from pytesseract.image_to_data output"""
+        lines = {}
+        for i, word in enumerate(data['text']):
+            if not word.strip():
+                continue
+            key = (data['block_num'][i], data['par_num'][i], data['line_num'][i])
+            lines.setdefault(key, []).append(word)
+
+        return "\n".join(" ".join(words) for _, words in sorted(lines.items()))
+
+    @staticmethod
+    def _median_text_height(data: Dict) -> Optional[float]:
+        """Median height in pixels of confidently recognized words"""
+        heights = [
+            data['height'][i]
+            for i, word in enumerate(data['text'])
+            if word.strip() and float(data['conf'][i]) > 30
+        ]
+        return statistics.median(heights) if heights else None
+
+    @staticmethod
+    def _cache_key(image: Image.Image, tag: str) -> str:
+        hasher = hashlib.sha256()
+        # The settings decide which DPI the text was read at, so changing them must miss the cache
+        hasher.update(f"v{OCR_CACHE_VERSION}:{settings.OCR_MIN_DPI}:{settings.OCR_MAX_DPI}:"
+                      f"{settings.OCR_TARGET_TEXT_HEIGHT_PX}:{tag}:{image.mode}:{image.size}".encode())
+        hasher.update(image.tobytes())
+        return hasher.hexdigest()
+
+    @staticmethod
+    def _cache_path(key: str) -> str:
+        return os.path.join(settings.OCR_CACHE_DIR, key[:2], f"{key}.txt")
+
+    def _cache_get(self, key: str) -> Optional[str]:
+        path = self._cache_path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                text = f.read()
+        except FileNotFoundError:
+            return None
+
+        # The modification time is the entry's last use, so hits survive eviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return text
+
+    def _cache_put(self, key: str, text: str):
+        path = self._cache_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + ".tmp", 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(path + ".tmp", path)
+
+        if self._cache_bytes is None:
+            self._cache_bytes = sum(size for _, size, _ in self._cache_entries())
+        else:
+            self._cache_bytes += os.path.getsize(path)
+
+        if self._cache_bytes > settings.OCR_CACHE_MAX_MB * 1024 * 1024:
+            self._evict_cache()
+
+    @staticmethod
+    def _cache_entries() -> List[Tuple[float, int, str]]:
+        """(last use, size, path) of every cached page"""
+        entries = []
+        for shard in os.scandir(settings.OCR_CACHE_DIR):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith(".txt"):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def _evict_cache(self):
+        """Remove least recently used entries until the cache is back under its budget"""
+        entries = sorted(self._cache_entries())
+        total = sum(size for _, size, _ in entries)
+        # Evict down to 90% so the next few writes do not rescan the directory again
+        target = settings.OCR_CACHE_MAX_MB * 1024 * 1024 * 0.9
+
+        removed = 0
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+
+        self._cache_bytes = total
+        logger.info(f"Evicted {removed} OCR cache entries")
+
     def _ocr_pdf_page(self, pdf_path: str, page_num: int) -> str:
         """OCR a specific PDF page"""
+        import pytesseract
+        from pdf2image import convert_from_path
+
         try:
             images = convert_from_path(
                 pdf_path,
                 first_page=page_num,
                 last_page=page_num,
-                dpi=300
+                dpi=FALLBACK_OCR_DPI
             )
 
             if images:
@@ -71,14 +340,25 @@ class OCRProcessor:
             return ""
 
     def _ocr_full_pdf(self, pdf_path: str) -> Dict:
-        """OCR entire PDF"""
+        """OCR entire PDF one page at a time to bound peak memory"""
+        from pdf2image import pdfinfo_from_path
+
         pages_data = []
 
         try:
-            images = convert_from_path(pdf_path, dpi=300)
+            page_count = pdfinfo_from_path(pdf_path)['Pages']
+
+            for page_num in range(1, page_count + 1):
+                with timed('ocr_page'):
+                    if self.adaptive:
+                        try:
+                            text = self._adaptive_ocr(self._pdf_page_renderer(pdf_path, page_num), cache_tag='page')
+                        except Exception as e:
+                            logger.error(f"OCR failed for page {page_num}: {e}")
+                            text = ""
+                    else:
+                        text = self._ocr_pdf_page(pdf_path, page_num)
 
-            for page_num, image in enumerate(images, 1):
-                text = pytesseract.image_to_string(image)
                 pages_data.append({
                     'page': page_num,
                     'text': text
@@ -91,9 +371,18 @@ class OCRProcessor:
 
     def _process_image(self, image_path: str) -> Dict:
         """Extract text from image using OCR"""
+        import pytesseract
+
         try:
             image = Image.open(image_path)
-            text = pytesseract.image_to_string(image)
+
+            with timed('ocr_page'):
+                if self.adaptive:
+                    # Treat the native resolution as the probe; small text is upsampled
+                    base_dpi = settings.OCR_MIN_DPI
+                    text = self._adaptive_ocr(self._scaled_renderer(image, base_dpi), cache_tag='image')
+                else:
+                    text = pytesseract.image_to_string(image)
 
             return {
                 'pages': [{
@@ -103,4 +392,4 @@ class OCRProcessor:
             }
         except Exception as e:
             logger.error(f"Image OCR failed: {e}")
-            return {'pages': []}
\ No newline at end of file
+            return {'pages': []}
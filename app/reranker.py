@@ -0,0 +1,110 @@
+import numpy as np
+from typing import List, Dict, Optional
+import logging
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def mmr_select(query_embedding: np.ndarray, embeddings: np.ndarray, k: int,
+               lambda_mult: float = 0.7, relevance: Optional[np.ndarray] = None) -> List[int]:
+    """Select k candidate positions with Maximal Marginal Relevance.
+
+    The full candidate similarity matrix is computed once, so each selection
+    step is a single vectorized update instead of a Python loop over pairs.
+    """
+    n = len(embeddings)
+    if n == 0 or k <= 0:
+        return []
+
+    emb = embeddings.astype('float32')
+    norms = np.linalg.norm(emb, axis=1, keepdims=True)
+    emb = emb / np.maximum(norms, 1e-12)
+
+    if relevance is None:
+        query = query_embedding.reshape(-1).astype('float32')
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
+        relevance = emb @ query
+    relevance = np.asarray(relevance, dtype='float32')
+
+    similarity = emb @ emb.T
+
+    selected = [int(np.argmax(relevance))]
+    max_similarity = similarity[selected[0]].copy()
+    available = np.ones(n, dtype=bool)
+    available[selected[0]] = False
+
+    while len(selected) < min(k, n):
+        scores = lambda_mult * relevance - (1.0 - lambda_mult) * max_similarity
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        np.maximum(max_similarity, similarity[best], out=max_similarity)
+
+    return selected
+
+
+class Reranker:
+    def __init__(self):
+        self.cross_encoder = None
+
+        # Only pay the model load at startup when reranking is on by default
+        if settings.RERANK_ENABLED:
+            self._get_cross_encoder()
+
+    def _get_cross_encoder(self):
+        if self.cross_encoder is None:
+            from sentence_transformers import CrossEncoder
+
+            logger.info(f"Loading cross-encoder model: {settings.RERANK_MODEL}")
+            self.cross_encoder = CrossEncoder(settings.RERANK_MODEL, device='cpu')
+        return self.cross_encoder
+
+    @staticmethod
+    def candidate_count(top_k: int) -> int:
+        """Number of first-stage candidates to fetch for a second stage"""
+        fetch_k = top_k * max(settings.RERANK_FETCH_MULTIPLIER, 1)
+        return max(min(fetch_k, settings.RERANK_MAX_CANDIDATES), top_k)
+
+    def rerank(self, query: str, query_embedding: np.ndarray, candidates: List[Dict], top_k: int,
+               use_cross_encoder: bool = True, use_mmr: bool = False) -> List[Dict]:
+        """Reorder first-stage candidates and return the best top_k"""
+        if not candidates:
+            return []
+
+        candidates = candidates[:settings.RERANK_MAX_CANDIDATES]
+        relevance = None
+
+        if use_cross_encoder:
+            import torch
+
+            model = self._get_cross_encoder()
+            pairs = [(query, c['text']) for c in candidates]
+
+            with torch.no_grad():
+                ce_scores = model.predict(
+                    pairs,
+                    batch_size=settings.RERANK_BATCH_SIZE,
+                    convert_to_numpy=True,
+                    show_progress_bar=False
+                )
+
+            order = np.argsort(-ce_scores)
+            candidates = [candidates[i] for i in order]
+            ce_scores = ce_scores[order]
+            for candidate, ce_score in zip(candidates, ce_scores):
+                candidate['rerank_score'] = float(ce_score)
+
+            # Min-max scale logits so they are comparable to cosine similarities in MMR
+            spread = float(ce_scores.max() - ce_scores.min())
+            relevance = (ce_scores - ce_scores.min()) / spread if spread > 0 else np.ones_like(ce_scores)
+
+        if use_mmr and all('embedding' in c for c in candidates):
+            embeddings = np.vstack([c['embedding'] for c in candidates])
+            selected = mmr_select(query_embedding, embeddings, top_k,
+                                  lambda_mult=settings.MMR_LAMBDA, relevance=relevance)
+            candidates = [candidates[i] for i in selected]
+
+        return candidates[:top_k]
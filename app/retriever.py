@@ -1,59 +1,405 @@
 import os
 import numpy as np
-import faiss
 import json
-from typing import List, Dict
+import threading
+from contextlib import contextmanager
+from typing import Iterator, List, Dict, Optional, Sequence, Set, Tuple, Union
 import logging
 
 from app.config import settings
+from app.catalog import DocumentCatalog
+from app.metrics import timed
 
 logger = logging.getLogger(__name__)
 
+# Compact per-vector metadata for memory-mapped snapshots; doc indexes into a document table
+CHUNK_REF_DTYPE = np.dtype([('doc', '<i4'), ('page', '<i4'), ('chunk_id', '<i4')])
+
+
+class MappedFlatIndex:
+    """Read-only flat L2 index over a memory-mapped float32 matrix.
+
+    The mapping is backed by the OS page cache, so every worker process
+    that maps the same file shares one physical copy of the vectors.
+    """
+
+    def __init__(self, vectors: np.ndarray):
+        self.vectors = vectors
+        self.ntotal, self.d = vectors.shape
+
+    def search(self, queries: np.ndarray, k: int):
+        import faiss
+
+        # Brute-force kNN straight off the mapping; same squared-L2 distances as IndexFlatL2
+        return faiss.knn(np.ascontiguousarray(queries, dtype='float32'), self.vectors, k)
+
+    def reconstruct(self, idx: int) -> np.ndarray:
+        return np.array(self.vectors[idx])
+
+    def reconstruct_n(self, start: int, n: int) -> np.ndarray:
+        return np.array(self.vectors[start:start + n])
+
+
+class MappedMetadata(Sequence):
+    """Read-only view giving metadata dicts over memory-mapped chunk refs"""
+
+    def __init__(self, refs: np.ndarray, documents: List[List[str]]):
+        self.refs = refs
+        self.documents = documents  # [doc_id, filename] per doc index
+        self._doc_index = {doc_id: i for i, (doc_id, _) in enumerate(documents)}
+
+    def __len__(self) -> int:
+        return len(self.refs)
+
+    def __getitem__(self, idx: Union[int, slice]):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+
+        ref = self.refs[idx]
+        doc_id, filename = self.documents[ref['doc']]
+        return {'doc_id': doc_id, 'filename': filename, 'page': int(ref['page']), 'chunk_id': int(ref['chunk_id'])}
+
+    def __iter__(self) -> Iterator[Dict]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def positions_of(self, doc_id: str) -> List[int]:
+        doc = self._doc_index.get(doc_id)
+        if doc is None:
+            return []
+        return np.nonzero(self.refs['doc'] == doc)[0].tolist()
+
+
+# (L2 distance, chunk metadata, vector or None) for one search hit, before chunk text is attached
+Hit = Tuple[float, Dict, Optional[np.ndarray]]
+
+
+def hits_to_results(catalog: DocumentCatalog, hits: List[Hit]) -> List[Dict]:
+    """Attach chunk text to search hits, fetched from the document store in one pass"""
+    with timed('chunk_lookup'):
+        chunk_texts = catalog.get_chunk_texts([(m['doc_id'], m['chunk_id']) for _, m, _ in hits])
+
+    results = []
+    for dist, chunk_metadata, embedding in hits:
+        chunk_text = chunk_texts.get((chunk_metadata['doc_id'], chunk_metadata['chunk_id']), "")
+
+        result = {
+            'text': chunk_text,
+            'metadata': chunk_metadata,
+            'score': 1.0 / (1.0 + dist)  # Convert L2 distance to similarity score
+        }
+
+        if embedding is not None:
+            result['embedding'] = embedding
+
+        results.append(result)
+
+    return results
+
+
+def _load_array(path: str) -> np.ndarray:
+    try:
+        return np.load(path, mmap_mode='r')
+    except ValueError:
+        # Zero-length arrays cannot be mapped
+        return np.load(path)
+
 
 class FAISSRetriever:
-    def __init__(self):
+    def __init__(self, index_dir: Optional[str] = None, catalog: Optional[DocumentCatalog] = None):
+        index_dir = index_dir or settings.FAISS_INDEX_PATH
+        os.makedirs(index_dir, exist_ok=True)
+
         self.index = None
         self.metadata = []
-        self.index_path = os.path.join(settings.FAISS_INDEX_PATH, "index.faiss")
-        self.metadata_path = os.path.join(settings.FAISS_INDEX_PATH, "metadata.json")
+        self.index_path = os.path.join(index_dir, "index.faiss")
+        self.metadata_path = os.path.join(index_dir, "metadata.json")
+        self.tombstones_path = os.path.join(index_dir, "tombstones.json")
+        self.catalog = catalog or DocumentCatalog()
+
+        # Vector ids of deleted/replaced chunks, filtered out of search until compaction
+        self.tombstones = set()
+        self._lock = threading.RLock()
+        self._compaction_thread = None
+        self._selector_cache = None
+
+        # Shared mode: vectors and chunk refs are memory-mapped from a versioned snapshot
+        # that all worker processes map read-only; writers also serialize on a lock file
+        self.shared = settings.INDEX_MMAP
+        self.index_dir = index_dir
+        self.snapshot_path = os.path.join(index_dir, "snapshot.json")
+        self.lock_path = os.path.join(index_dir, "write.lock")
+        self._generation = 0
+        self._snapshot_stat = None
+        self._snapshot_source = None
+        self._local = threading.local()
+
+        # Serializes writers so saves can read the index without blocking searches on _lock
+        self._write_mutex = threading.Lock()
 
         # Try to load existing index
         self.load_index()
 
     def build_index(self, embeddings: np.ndarray, metadata: List[Dict]):
         """Build FAISS index with disk-backed storage"""
-        if len(embeddings) == 0:
+        # A (0, d) array builds an empty index (e.g. a shard with no documents)
+        if embeddings.ndim != 2:
             raise ValueError("No embeddings provided")
 
+        import faiss
+
         dimension = embeddings.shape[1]
         logger.info(f"Building FAISS index with {len(embeddings)} vectors, dim={dimension}")
 
         # Use IndexFlatL2 for simplicity and accuracy
         # For larger datasets, consider IndexIVFFlat with mmap
-        self.index = faiss.IndexFlatL2(dimension)
+        index = faiss.IndexFlatL2(dimension)
 
         # Add vectors to index
-        self.index.add(embeddings.astype('float32'))
+        index.add(embeddings.astype('float32'))
 
-        # Store metadata
-        self.metadata = metadata
+        with self._exclusive_write():
+            with self._lock:
+                self.index = index
+                self.metadata = metadata
+                self.tombstones = set()
 
-        # Save to disk
-        self.save_index()
+            # Save to disk
+            self.save_index()
 
         logger.info(f"Index built with {self.index.ntotal} vectors")
 
+    def add_vectors(self, embeddings: np.ndarray, metadata: List[Dict], save: bool = True):
+        """Append vectors to the live index, building it if none exists yet.
+
+        Bulk loaders pass save=False and call save_index() at their own checkpoints.
+        """
+        if len(embeddings) == 0:
+            return
+
+        with self._exclusive_write(materialize=True):
+            if self.index is None:
+                self.build_index(embeddings, metadata)
+                return
+
+            with self._lock:
+                self.index.add(embeddings.astype('float32'))
+                self.metadata.extend(metadata)
+            if save:
+                self.save_index()
+
+        logger.info(f"Added {len(embeddings)} vectors, index now has {self.index.ntotal}")
+
     def save_index(self):
-        """Save index and metadata to disk"""
-        faiss.write_index(self.index, self.index_path)
+        """Save index, metadata and tombstones to disk.
+
+        Writers are excluded for the duration, so the index cannot change
+        underneath the write and searches carry on without waiting for it.
+        """
+        import faiss
+
+        with self._exclusive_write():
+            # Write to temp files and rename so readers never see a partial index
+            faiss.write_index(self.index, self.index_path + ".tmp")
+            with open(self.metadata_path + ".tmp", 'w') as f:
+                json.dump(self.metadata, f)
 
-        with open(self.metadata_path, 'w') as f:
-            json.dump(self.metadata, f, indent=2)
+            os.replace(self.index_path + ".tmp", self.index_path)
+            os.replace(self.metadata_path + ".tmp", self.metadata_path)
+
+            # In shared mode the new snapshot's manifest carries the tombstones; pairing them
+            # with the old generation first would hide the wrong vectors from readers
+            self._save_tombstones(write_manifest=False)
+
+            if self.shared:
+                self._write_snapshot()
 
         logger.info(f"Index saved to {self.index_path}")
 
+    def _save_tombstones(self, write_manifest: bool = True):
+        with open(self.tombstones_path + ".tmp", 'w') as f:
+            json.dump(sorted(self.tombstones), f)
+        os.replace(self.tombstones_path + ".tmp", self.tombstones_path)
+
+        if write_manifest and self.shared and self._generation:
+            self._write_manifest()
+
+    def _snapshot_file(self, name: str, generation: int) -> str:
+        return os.path.join(self.index_dir, name.format(generation=generation))
+
+    def _write_snapshot(self):
+        """Write vectors and chunk refs as a new mmap-able generation, then map it"""
+        import faiss
+
+        generation = self._generation + 1
+        if self.index.ntotal:
+            # A view of the flat index's own storage; writers are excluded, so it cannot change mid-save
+            vectors = faiss.rev_swig_ptr(self.index.get_xb(), self.index.ntotal * self.index.d)
+            vectors = vectors.reshape(self.index.ntotal, self.index.d)
+        else:
+            vectors = np.zeros((0, self.index.d), dtype='float32')
+
+        documents, doc_index = [], {}
+        refs = np.empty(len(self.metadata), dtype=CHUNK_REF_DTYPE)
+        for i, m in enumerate(self.metadata):
+            if m['doc_id'] not in doc_index:
+                doc_index[m['doc_id']] = len(documents)
+                documents.append([m['doc_id'], m['filename']])
+            refs[i] = (doc_index[m['doc_id']], m.get('page', 0), m['chunk_id'])
+
+        for name, array in (("vectors.{generation}.npy", vectors), ("chunk_refs.{generation}.npy", refs)):
+            path = self._snapshot_file(name, generation)
+            with open(path + ".tmp", 'wb') as f:
+                np.save(f, np.ascontiguousarray(array))
+            os.replace(path + ".tmp", path)
+
+        documents_path = self._snapshot_file("documents.{generation}.json", generation)
+        with open(documents_path + ".tmp", 'w') as f:
+            json.dump(documents, f)
+        os.replace(documents_path + ".tmp", documents_path)
+
+        self._generation = generation
+        self._write_manifest()
+        self._load_snapshot()
+
+        # Workers still mapping an older generation keep it alive until they remap
+        for name in os.listdir(self.index_dir):
+            parts = name.split('.')
+            if len(parts) == 3 and parts[0] in ('vectors', 'chunk_refs', 'documents') \
+                    and parts[1].isdigit() and int(parts[1]) < generation:
+                try:
+                    os.remove(os.path.join(self.index_dir, name))
+                except FileNotFoundError:
+                    pass
+
+    def _write_manifest(self):
+        """Point readers at the current generation and tombstone set"""
+        with open(self.snapshot_path + ".tmp", 'w') as f:
+            json.dump({'generation': self._generation, 'tombstones': sorted(self.tombstones),
+                       'source': self._source_stat()}, f)
+        os.replace(self.snapshot_path + ".tmp", self.snapshot_path)
+
+        stat = os.stat(self.snapshot_path)
+        self._snapshot_stat = (stat.st_ino, stat.st_mtime_ns)
+        self._snapshot_source = self._source_stat()
+
+    def _source_stat(self) -> List[Optional[List[int]]]:
+        """Identity of index.faiss and tombstones.json, which every save rewrites"""
+        stats = []
+        for path in (self.index_path, self.tombstones_path):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                stats.append(None)
+                continue
+            stats.append([stat.st_ino, stat.st_mtime_ns, stat.st_size])
+        return stats
+
+    def _load_snapshot(self):
+        stat = os.stat(self.snapshot_path)
+        with open(self.snapshot_path, 'r') as f:
+            manifest = json.load(f)
+
+        generation = manifest['generation']
+        index = metadata = None
+        if generation != self._generation or not isinstance(self.index, MappedFlatIndex):
+            vectors = _load_array(self._snapshot_file("vectors.{generation}.npy", generation))
+            refs = _load_array(self._snapshot_file("chunk_refs.{generation}.npy", generation))
+            with open(self._snapshot_file("documents.{generation}.json", generation), 'r') as f:
+                documents = json.load(f)
+            index, metadata = MappedFlatIndex(vectors), MappedMetadata(refs, documents)
+
+        with self._lock:
+            if index is not None:
+                self.index, self.metadata = index, metadata
+                self._generation = generation
+            self.tombstones = set(manifest['tombstones'])
+            self._snapshot_stat = (stat.st_ino, stat.st_mtime_ns)
+            self._snapshot_source = manifest.get('source')
+
+    def refresh(self):
+        """Pick up a snapshot or tombstones written by another worker process"""
+        if not self.shared:
+            return
+
+        try:
+            stat = os.stat(self.snapshot_path)
+        except FileNotFoundError:
+            return
+        if (stat.st_ino, stat.st_mtime_ns) == self._snapshot_stat:
+            return
+
+        try:
+            self._load_snapshot()
+        except (OSError, ValueError, KeyError) as e:
+            # A writer replaced the generation mid-load; keep serving the current mapping
+            logger.warning(f"Index snapshot reload failed, will retry: {e}")
+
+    def _materialize(self):
+        """Copy a mapped snapshot into a writable in-memory index"""
+        import faiss
+
+        with self._lock:
+            if not isinstance(self.index, MappedFlatIndex):
+                return
+            index = faiss.IndexFlatL2(self.index.d)
+            if self.index.ntotal:
+                # Added straight from the mapping, so the vectors are copied once
+                index.add(np.ascontiguousarray(self.index.vectors))
+            self.index = index
+            self.metadata = list(self.metadata)
+
+    @contextmanager
+    def _exclusive_write(self, materialize: bool = False) -> Iterator[None]:
+        """Serialize writers, across worker processes in shared mode starting from the latest snapshot"""
+        if getattr(self._local, 'writing', False):
+            yield
+            return
+
+        with self._write_mutex:
+            self._local.writing = True
+            try:
+                if not self.shared:
+                    yield
+                    return
+
+                import fcntl
+
+                with open(self.lock_path, 'w') as lock_file:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                    try:
+                        self.refresh()
+                        if materialize:
+                            self._materialize()
+                        yield
+                    finally:
+                        fcntl.flock(lock_file, fcntl.LOCK_UN)
+            finally:
+                self._local.writing = False
+
     def load_index(self):
         """Load index from disk if exists"""
+        if self.shared:
+            with self._exclusive_write():
+                # A snapshot records which index.faiss it was exported from; one saved since
+                # (by bulk_ingest or a run without INDEX_MMAP) is newer and must be re-exported
+                if self._snapshot_stat is not None and self._snapshot_source == self._source_stat():
+                    return
+                if self._snapshot_stat is not None:
+                    logger.info("Index files changed since the last snapshot, re-exporting")
+
+                # First shared start on an existing index: export it once as a snapshot
+                self._load_faiss_index()
+                if self.index is not None:
+                    with self._lock:
+                        self._write_snapshot()
+            return
+
+        self._load_faiss_index()
+
+    def _load_faiss_index(self):
+        import faiss
+
         if os.path.exists(self.index_path) and os.path.exists(self.metadata_path):
             try:
                 self.index = faiss.read_index(self.index_path)
@@ -61,50 +407,243 @@ class FAISSRetriever:
                 with open(self.metadata_path, 'r') as f:
                     self.metadata = json.load(f)
 
-                logger.info(f"Loaded index with {self.index.ntotal} vectors")
+                if os.path.exists(self.tombstones_path):
+                    with open(self.tombstones_path, 'r') as f:
+                        self.tombstones = set(json.load(f))
+
+                self._reconcile()
+
+                logger.info(f"Loaded index with {self.index.ntotal} vectors "
+                            f"({len(self.tombstones)} tombstoned)")
             except Exception as e:
                 logger.error(f"Failed to load index: {e}")
                 self.index = None
                 self.metadata = []
+                self.tombstones = set()
+
+    def _reconcile(self):
+        """Trim an index whose vectors and metadata disagree after a crash between their saves"""
+        import faiss
+
+        if self.index.ntotal == len(self.metadata):
+            return
+
+        keep = min(self.index.ntotal, len(self.metadata))
+        logger.warning(f"Index has {self.index.ntotal} vectors but {len(self.metadata)} "
+                       f"metadata entries; truncating to {keep}")
+
+        if self.index.ntotal > keep:
+            self.index.remove_ids(faiss.IDSelectorRange(keep, self.index.ntotal))
+        self.metadata = self.metadata[:keep]
+        self.tombstones = {i for i in self.tombstones if i < keep}
+
+    def tombstone_document(self, doc_id: str) -> int:
+        """Hide all vectors of a document from search; returns the number tombstoned"""
+        with self._exclusive_write():
+            with self._lock:
+                if isinstance(self.metadata, MappedMetadata):
+                    positions = self.metadata.positions_of(doc_id)
+                else:
+                    positions = [i for i, m in enumerate(self.metadata) if m['doc_id'] == doc_id]
+                vector_ids = [i for i in positions if i not in self.tombstones]
+                if not vector_ids:
+                    return 0
+
+                # Replaced rather than updated in place; searches cache a selector per set
+                self.tombstones = self.tombstones | set(vector_ids)
+            self._save_tombstones()
 
-    def search(self, query_embedding: np.ndarray, top_k: int = 5) -> List[Dict]:
+        logger.info(f"Tombstoned {len(vector_ids)} vectors of {doc_id}")
+        self.maybe_compact()
+        return len(vector_ids)
+
+    def maybe_compact(self):
+        """Start background compaction once tombstones pass COMPACTION_THRESHOLD"""
+        with self._lock:
+            if self.index is None or self.index.ntotal == 0:
+                return
+            if len(self.tombstones) / self.index.ntotal < settings.COMPACTION_THRESHOLD:
+                return
+            if self._compaction_thread is not None and self._compaction_thread.is_alive():
+                return
+
+            self._compaction_thread = threading.Thread(target=self.compact, name="faiss-compaction", daemon=True)
+            self._compaction_thread.start()
+
+    def compact(self):
+        """Rebuild the index without tombstoned vectors.
+
+        The expensive rebuild runs outside the lock so searches keep being
+        served from the old index and appends keep landing; only the final
+        swap is locked and the save happens after it.
+        """
+        if not self.shared:
+            self._compact()
+            return
+
+        # Other processes only append through the snapshot, so shared mode holds the write lock throughout
+        with self._exclusive_write():
+            self._compact()
+
+    def _compact(self):
+        import faiss
+
+        with self._lock:
+            # Another worker process may have compacted already
+            if self.index is None or not self.tombstones:
+                return
+            snapshot_index = self.index
+            snapshot_total = self.index.ntotal
+            snapshot_tombstones = set(self.tombstones)
+            dimension = self.index.d
+            vectors = self.index.reconstruct_n(0, snapshot_total)
+
+        keep = np.array([i for i in range(snapshot_total) if i not in snapshot_tombstones], dtype='int64')
+        logger.info(f"Compacting index: dropping {snapshot_total - len(keep)} of {snapshot_total} vectors")
+
+        new_index = faiss.IndexFlatL2(dimension)
+        if len(keep):
+            new_index.add(np.ascontiguousarray(vectors[keep]))
+        del vectors
+
+        with self._exclusive_write():
+            with self._lock:
+                # A full rebuild replaced the index meanwhile; nothing left to compact
+                if self.index is not snapshot_index:
+                    logger.info("Index was rebuilt during compaction, discarding compacted copy")
+                    return
+
+                # Map surviving old ids to their new positions
+                remap = {int(old): new for new, old in enumerate(keep)}
+                new_metadata = [self.metadata[i] for i in keep]
+
+                # Carry over vectors appended while the rebuild was running
+                if self.index.ntotal > snapshot_total:
+                    appended = self.index.reconstruct_n(snapshot_total, self.index.ntotal - snapshot_total)
+                    for offset in range(len(appended)):
+                        remap[snapshot_total + offset] = new_index.ntotal + offset
+                    new_index.add(appended)
+                    new_metadata.extend(self.metadata[snapshot_total:])
+
+                # Keep tombstones that were added during the rebuild
+                self.tombstones = {remap[t] for t in self.tombstones if t not in snapshot_tombstones and t in remap}
+                self.index = new_index
+                self.metadata = new_metadata
+
+            self.save_index()
+
+        logger.info(f"Compaction finished, index now has {new_index.ntotal} vectors")
+
+    def search(self, query_embedding: np.ndarray, top_k: int = 5,
+               include_embeddings: bool = False) -> List[Dict]:
         """Search for similar documents"""
-        if self.index is None or self.index.ntotal == 0:
-            raise ValueError("Index is empty. Build index first.")
+        with timed('faiss_search'):
+            hits = self.search_vectors(query_embedding, top_k, include_embeddings)
 
-        # Reshape query embedding
-        query_embedding = query_embedding.reshape(1, -1).astype('float32')
+        return hits_to_results(self.catalog, hits)
 
-        # Search
-        distances, indices = self.index.search(query_embedding, top_k)
+    def search_vectors(self, query_embedding: np.ndarray, top_k: int = 5,
+                       include_embeddings: bool = False) -> List[Hit]:
+        """Nearest live vectors, closest first, without chunk text"""
+        self.refresh()
 
-        # Prepare results
-        results = []
-        for i, (dist, idx) in enumerate(zip(distances[0], indices[0])):
-            if idx < len(self.metadata):
-                metadata = self.metadata[idx]
+        with self._lock:
+            index, metadata, tombstones = self.index, self.metadata, self.tombstones
 
-                # Get original text from metadata
-                doc_id = metadata['doc_id']
-                chunk_id = metadata['chunk_id']
+            if index is None or index.ntotal == 0:
+                raise ValueError("Index is empty. Build index first.")
 
-                # Load document to get chunk text
-                from app.ingestion import DocumentIngestion
-                ingest = DocumentIngestion()
-                doc = ingest.get_document(doc_id)
+            # Reshape query embedding
+            query_embedding = query_embedding.reshape(1, -1).astype('float32')
 
-                if doc and chunk_id < len(doc['chunks']):
-                    chunk_text = doc['chunks'][chunk_id]['text']
-                else:
-                    chunk_text = ""
+            hits = self._search_live(index, metadata, tombstones, query_embedding, top_k)
+
+            # Candidate vectors are needed for MMR diversification
+            return [
+                (dist, metadata[idx], index.reconstruct(idx) if include_embeddings else None)
+                for dist, idx in hits
+            ]
+
+    def _search_live(self, index, metadata: Sequence[Dict], tombstones: Set[int],
+                     query_embedding: np.ndarray, top_k: int) -> List[Tuple[float, int]]:
+        """(distance, vector id) of the top_k nearest vectors that are not tombstoned"""
+        k = min(top_k, index.ntotal)
+
+        if not tombstones:
+            distances, indices = index.search(query_embedding, k)
+        elif isinstance(index, MappedFlatIndex):
+            # faiss.knn takes no ID selector: over-fetch in a few growing rounds until top_k
+            # live hits are found, rather than fetching top_k + every tombstone up front
+            limit = min(top_k + len(tombstones), index.ntotal)
+            while True:
+                k = min(k * 4, limit)
+                distances, indices = index.search(query_embedding, k)
+                live = sum(1 for idx in indices[0] if idx >= 0 and idx not in tombstones)
+                if live >= top_k or k == limit:
+                    break
+        else:
+            import faiss
+
+            # The selector makes FAISS skip tombstoned ids while scanning, so k stays top_k
+            params = faiss.SearchParameters(sel=self._tombstone_selector(tombstones))
+            distances, indices = index.search(query_embedding, k, params=params)
+
+        return [
+            (float(dist), int(idx))
+            for dist, idx in zip(distances[0], indices[0])
+            # FAISS pads with -1 when fewer than k vectors match
+            if 0 <= idx < len(metadata) and idx not in tombstones
+        ][:top_k]
+
+    def _tombstone_selector(self, tombstones: Set[int]):
+        """ID selector excluding the tombstones, rebuilt only when the tombstone set changes"""
+        import faiss
+
+        # Tombstone sets are replaced rather than mutated, so identity tells whether it changed
+        cached = self._selector_cache
+        if cached is not None and cached[0] is tombstones:
+            return cached[2]
+
+        batch = faiss.IDSelectorBatch(np.fromiter(tombstones, dtype='int64', count=len(tombstones)))
+        selector = faiss.IDSelectorNot(batch)
+        # The Not selector only points at the batch, so both are kept alive here
+        self._selector_cache = (tombstones, batch, selector)
+        return selector
+
+    # Accessors refresh first so a worker decides on another worker's latest snapshot
+    @property
+    def ntotal(self) -> int:
+        """Vectors in the index, tombstoned ones included"""
+        self.refresh()
+        index = self.index
+        return index.ntotal if index is not None else 0
+
+    @property
+    def num_tombstones(self) -> int:
+        self.refresh()
+        return len(self.tombstones)
+
+    def has_index(self) -> bool:
+        self.refresh()
+        return self.index is not None
 
-                results.append({
-                    'text': chunk_text,
-                    'metadata': metadata,
-                    'score': 1.0 / (1.0 + float(dist))  # Convert L2 distance to similarity score
-                })
+    def doc_ids(self) -> Set[str]:
+        """Documents with vectors in the index"""
+        self.refresh()
+        with self._lock:
+            if isinstance(self.metadata, MappedMetadata):
+                return {doc_id for doc_id, _ in self.metadata.documents}
+            return {m['doc_id'] for m in self.metadata}
 
-        return results
+    def memory_bytes(self) -> int:
+        """Approximate resident size of the loaded index and vector metadata"""
+        if self.index is None:
+            return 0
+        if isinstance(self.index, MappedFlatIndex):
+            # Mapped pages are shared with other workers and reclaimable by the OS
+            return self.index.ntotal * (self.index.d * 4 + CHUNK_REF_DTYPE.itemsize)
+        # Flat index stores float32 vectors; metadata dicts cost roughly 200 bytes each
+        return self.index.ntotal * self.index.d * 4 + len(self.metadata) * 200
 
     def get_index_size_mb(self) -> float:
         """Get index file size in MB"""
@@ -0,0 +1,89 @@
+"""Multi-worker serving with one shared embedding model and memory-mapped indexes.
+
+    python -m app.serve --workers 4
+
+Starts the embedding model server, waits for it to load, then runs uvicorn
+with N workers. Each worker embeds through the model server and maps index
+snapshots read-only (INDEX_MMAP), so adding workers adds cores without
+adding a model or an index copy per process.
+"""
+
+import os
+import sys
+import time
+import argparse
+import multiprocessing
+from multiprocessing.connection import Client
+from typing import List, Optional
+import logging
+
+from app.config import settings
+from app.model_server import EmbeddingServer, connection_authkey
+from app.utils import setup_logging
+
+logger = logging.getLogger(__name__)
+
+MODEL_SERVER_START_TIMEOUT = 600  # Seconds; covers a first-run model download
+
+
+def _run_model_server(address: str):
+    setup_logging()
+    EmbeddingServer(address).serve_forever()
+
+
+def _wait_for_model_server(address: str, process: multiprocessing.Process) -> bool:
+    deadline = time.time() + MODEL_SERVER_START_TIMEOUT
+    while time.time() < deadline:
+        if not process.is_alive():
+            return False
+        try:
+            Client(address, family='AF_UNIX', authkey=connection_authkey()).close()
+            return True
+        except (FileNotFoundError, ConnectionRefusedError):
+            time.sleep(0.5)
+    return False
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Serve the API with several workers sharing one model and index")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=settings.SERVE_WORKERS)
+    parser.add_argument("--socket",
+                        default=settings.EMBEDDING_SERVER_ADDRESS or os.path.join(settings.DATA_DIR, "embedding.sock"),
+                        help="Unix socket for the embedding model server")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import uvicorn
+
+    args = parse_args(argv)
+    setup_logging()
+
+    address = os.path.abspath(args.socket)
+    model_server = multiprocessing.get_context("spawn").Process(
+        target=_run_model_server, args=(address,), name="embedding-server", daemon=True
+    )
+    model_server.start()
+
+    logger.info("Waiting for the embedding model server to load...")
+    if not _wait_for_model_server(address, model_server):
+        logger.error("Embedding model server failed to start")
+        model_server.terminate()
+        return 1
+
+    # Workers read these through Settings when uvicorn spawns them
+    os.environ["EMBEDDING_SERVER_ADDRESS"] = address
+    os.environ["INDEX_MMAP"] = "true"
+
+    try:
+        uvicorn.run("app.main:app", host=args.host, port=args.port, workers=args.workers)
+    finally:
+        model_server.terminate()
+        model_server.join(timeout=10)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
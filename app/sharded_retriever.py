@@ -0,0 +1,258 @@
+import os
+import json
+import heapq
+import shutil
+import zlib
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Set, Tuple, Union
+import numpy as np
+import logging
+
+from app.config import settings
+from app.catalog import DocumentCatalog
+from app.metrics import timed
+from app.retriever import FAISSRetriever, Hit, hits_to_results
+
+logger = logging.getLogger(__name__)
+
+SHARD_MANIFEST = "shards.json"
+
+# Files of a single (unsharded) index that a migration replaces with shards
+UNSHARDED_FILES = ("index.faiss", "metadata.json", "tombstones.json")
+
+# Shared by every sharded index in the process so concurrent queries and builds cannot oversubscribe cores
+_search_pool = None
+_build_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_search_pool() -> ThreadPoolExecutor:
+    global _search_pool
+    if _search_pool is None:
+        with _pool_lock:
+            if _search_pool is None:
+                workers = settings.INDEX_SEARCH_THREADS or os.cpu_count() or 1
+                _search_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="shard-search")
+    return _search_pool
+
+
+def _get_build_pool() -> ThreadPoolExecutor:
+    # Builds and appends get their own threads so queries never queue behind them;
+    # half the cores keeps a rebuild from starving the searches running alongside it
+    global _build_pool
+    if _build_pool is None:
+        with _pool_lock:
+            if _build_pool is None:
+                workers = max((os.cpu_count() or 2) // 2, 1)
+                _build_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="shard-build")
+    return _build_pool
+
+
+def shard_for(doc_id: str, num_shards: int) -> int:
+    """Stable doc_id -> shard routing (crc32, identical across processes and restarts)"""
+    return zlib.crc32(doc_id.encode('utf-8')) % num_shards
+
+
+def open_retriever(index_dir: str, catalog: DocumentCatalog) -> Union[FAISSRetriever, "ShardedFAISSRetriever"]:
+    """Open a collection's index, sharded when configured or already sharded on disk"""
+    if settings.INDEX_SHARDS > 1 or os.path.exists(os.path.join(index_dir, SHARD_MANIFEST)):
+        return ShardedFAISSRetriever(index_dir=index_dir, catalog=catalog)
+    return FAISSRetriever(index_dir=index_dir, catalog=catalog)
+
+
+class ShardedFAISSRetriever:
+    """An index split by document across FAISSRetriever shards.
+
+    Each shard lives in its own subdirectory and builds, compacts and
+    persists on its own. Queries run on all shards concurrently (FAISS
+    releases the GIL while searching) and the per-shard top-k lists are
+    merged with a heap.
+    """
+
+    def __init__(self, index_dir: Optional[str] = None, catalog: Optional[DocumentCatalog] = None,
+                 num_shards: Optional[int] = None):
+        self.index_dir = index_dir or settings.FAISS_INDEX_PATH
+        os.makedirs(self.index_dir, exist_ok=True)
+        self.catalog = catalog or DocumentCatalog()
+        self.manifest_path = os.path.join(self.index_dir, SHARD_MANIFEST)
+        self.configured_shards = max(num_shards or settings.INDEX_SHARDS, 1)
+        self._lock = threading.Lock()
+
+        # Routing has to match how vectors on disk were placed; a full build_index reshards
+        on_disk = self._read_manifest()
+        if on_disk and on_disk != self.configured_shards:
+            logger.warning(f"Index in {self.index_dir} has {on_disk} shards, {self.configured_shards} configured; "
+                           f"rebuild the index to reshard")
+
+        self.num_shards = on_disk or self.configured_shards
+        self.shards = self._open_shards(self.num_shards)
+
+        if on_disk is None:
+            self._migrate_unsharded()
+
+    def _shard_dir(self, shard_id: int) -> str:
+        return os.path.join(self.index_dir, f"shard_{shard_id:03d}")
+
+    def _open_shards(self, num_shards: int) -> List[FAISSRetriever]:
+        return [FAISSRetriever(index_dir=self._shard_dir(i), catalog=self.catalog) for i in range(num_shards)]
+
+    def _read_manifest(self) -> Optional[int]:
+        if not os.path.exists(self.manifest_path):
+            return None
+        with open(self.manifest_path, 'r') as f:
+            return json.load(f)['num_shards']
+
+    def _write_manifest(self):
+        with open(self.manifest_path + ".tmp", 'w') as f:
+            json.dump({'num_shards': self.num_shards}, f)
+        os.replace(self.manifest_path + ".tmp", self.manifest_path)
+
+    def _migrate_unsharded(self):
+        """Split an existing single index in index_dir into shards and write the manifest.
+
+        The manifest goes last, so a migration interrupted part-way is simply
+        redone on the next start.
+        """
+        unsharded = os.path.exists(os.path.join(self.index_dir, "index.faiss"))
+        if unsharded:
+            single = FAISSRetriever(index_dir=self.index_dir, catalog=self.catalog)
+            if single.ntotal:
+                live = [i for i in range(single.ntotal) if i not in single.tombstones]
+                vectors = single.index.reconstruct_n(0, single.ntotal)[live]
+                logger.info(f"Splitting existing index ({len(live)} live vectors) into {self.num_shards} shards")
+                self._build_shards(self.shards, vectors, [single.metadata[i] for i in live])
+
+        self._write_manifest()
+
+        if unsharded:
+            self._retire_unsharded_files()
+
+    def _retire_unsharded_files(self):
+        """Set the migrated single index aside so it is not mistaken for live data"""
+        for name in os.listdir(self.index_dir):
+            path = os.path.join(self.index_dir, name)
+            parts = name.split('.')
+            try:
+                if name in UNSHARDED_FILES:
+                    os.replace(path, path + ".migrated")
+                elif name == "snapshot.json" or (len(parts) == 3 and parts[1].isdigit()
+                                                 and parts[0] in ('vectors', 'chunk_refs', 'documents')):
+                    # The old index's shared-mode snapshot; index.faiss.migrated still holds its vectors
+                    os.remove(path)
+            except FileNotFoundError:
+                pass  # Another worker process migrated concurrently
+
+    def shard_for(self, doc_id: str) -> int:
+        return shard_for(doc_id, self.num_shards)
+
+    @staticmethod
+    def _partition(embeddings: np.ndarray, metadata: List[Dict],
+                   num_shards: int) -> List[Tuple[np.ndarray, List[Dict]]]:
+        assignments = np.fromiter((shard_for(m['doc_id'], num_shards) for m in metadata),
+                                  dtype=np.int64, count=len(metadata))
+        parts = []
+        for shard_id in range(num_shards):
+            positions = np.nonzero(assignments == shard_id)[0]
+            parts.append((embeddings[positions], [metadata[i] for i in positions]))
+        return parts
+
+    def _build_shards(self, shards: List[FAISSRetriever], embeddings: np.ndarray, metadata: List[Dict]):
+        parts = self._partition(embeddings, metadata, len(shards))
+        list(_get_build_pool().map(lambda job: job[0].build_index(*job[1]), zip(shards, parts)))
+
+    def build_index(self, embeddings: np.ndarray, metadata: List[Dict]):
+        """Rebuild every shard in parallel, resharding to the configured count"""
+        if embeddings.ndim != 2 or len(embeddings) == 0:
+            raise ValueError("No embeddings provided")
+
+        num_shards = self.configured_shards
+        shards = self.shards if num_shards == self.num_shards else self._open_shards(num_shards)
+        self._build_shards(shards, embeddings, metadata)
+
+        with self._lock:
+            previous = self.num_shards
+            self.shards, self.num_shards = shards, num_shards
+            self._write_manifest()
+
+        for shard_id in range(num_shards, previous):
+            shutil.rmtree(self._shard_dir(shard_id), ignore_errors=True)
+
+        logger.info(f"Index built with {self.ntotal} vectors across {num_shards} shards")
+
+    def build_shard(self, shard_id: int, embeddings: np.ndarray, metadata: List[Dict]):
+        """Rebuild one shard from the vectors of the documents routed to it"""
+        if not 0 <= shard_id < self.num_shards:
+            raise ValueError(f"Shard {shard_id} out of range (index has {self.num_shards} shards)")
+
+        misrouted = {m['doc_id'] for m in metadata if self.shard_for(m['doc_id']) != shard_id}
+        if misrouted:
+            raise ValueError(f"{len(misrouted)} documents do not belong to shard {shard_id}")
+
+        self.shards[shard_id].build_index(embeddings, metadata)
+
+    def add_vectors(self, embeddings: np.ndarray, metadata: List[Dict], save: bool = True):
+        """Append vectors to the shards their documents route to"""
+        if len(embeddings) == 0:
+            return
+
+        jobs = [
+            (shard, part)
+            for shard, part in zip(self.shards, self._partition(embeddings, metadata, self.num_shards))
+            if len(part[1])
+        ]
+        list(_get_build_pool().map(lambda job: job[0].add_vectors(*job[1], save=save), jobs))
+
+    def save_index(self):
+        for shard in self.shards:
+            shard.save_index()
+
+    def tombstone_document(self, doc_id: str) -> int:
+        """Hide all vectors of a document from search; returns the number tombstoned"""
+        return self.shards[self.shard_for(doc_id)].tombstone_document(doc_id)
+
+    def compact(self):
+        for shard in self.shards:
+            shard.compact()
+
+    def search(self, query_embedding: np.ndarray, top_k: int = 5,
+               include_embeddings: bool = False) -> List[Dict]:
+        """Search all shards in parallel and merge their top-k"""
+        # ntotal refreshes each shard first, so in shared mode a shard built by another
+        # worker counts as non-empty here rather than being skipped on a stale mapping
+        shards = [shard for shard in self.shards if shard.ntotal > 0]
+        if not shards:
+            raise ValueError("Index is empty. Build index first.")
+
+        with timed('faiss_search'):
+            futures = [
+                _get_search_pool().submit(shard.search_vectors, query_embedding, top_k, include_embeddings)
+                for shard in shards
+            ]
+            per_shard: List[List[Hit]] = [future.result() for future in futures]
+
+            # Each shard's hits are sorted by distance, so a heap merge yields the global top-k
+            hits = list(itertools.islice(heapq.merge(*per_shard, key=lambda hit: hit[0]), top_k))
+
+        return hits_to_results(self.catalog, hits)
+
+    @property
+    def ntotal(self) -> int:
+        return sum(shard.ntotal for shard in self.shards)
+
+    @property
+    def num_tombstones(self) -> int:
+        return sum(shard.num_tombstones for shard in self.shards)
+
+    def has_index(self) -> bool:
+        return any(shard.has_index() for shard in self.shards)
+
+    def doc_ids(self) -> Set[str]:
+        return set().union(*(shard.doc_ids() for shard in self.shards))
+
+    def memory_bytes(self) -> int:
+        return sum(shard.memory_bytes() for shard in self.shards)
+
+    def get_index_size_mb(self) -> float:
+        return sum(shard.get_index_size_mb() for shard in self.shards)
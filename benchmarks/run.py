@@ -0,0 +1,408 @@
+"""Offline benchmark suite for ingestion, indexing and query paths.
+
+Every suite runs in a fresh process against a throwaway data directory,
+so results are isolated from each other and from real data, and the
+reported peak RSS belongs to that suite alone.
+
+Usage:
+    python -m benchmarks.run                          # all suites, default sizes
+    python -m benchmarks.run --suites retriever --vectors 10000,100000,1000000
+    python -m benchmarks.run --suites retriever --vectors 1000000 --shards 1,2,4
+    python -m benchmarks.run --output results/baseline.json
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import platform
+import resource
+import tempfile
+import subprocess
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, List
+
+import numpy as np
+
+SUITES = ('chunking', 'ocr', 'embedding', 'retriever', 'query')
+
+
+def latency_stats(samples_seconds: List[float]) -> Dict:
+    """p50/p95/p99/mean/max in milliseconds"""
+    if not samples_seconds:
+        return {}
+    ms = np.asarray(samples_seconds) * 1000
+    return {
+        'count': len(ms),
+        'mean_ms': round(float(ms.mean()), 3),
+        'p50_ms': round(float(np.percentile(ms, 50)), 3),
+        'p95_ms': round(float(np.percentile(ms, 95)), 3),
+        'p99_ms': round(float(np.percentile(ms, 99)), 3),
+        'max_ms': round(float(ms.max()), 3),
+    }
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def _configure_environment(work_dir: str):
+    """Point all storage settings at work_dir; must run before app modules are imported"""
+    paths = {
+        'DATA_DIR': work_dir,
+        'FAISS_INDEX_PATH': os.path.join(work_dir, 'faiss_index'),
+        'UPLOAD_DIR': os.path.join(work_dir, 'uploads'),
+        'PROCESSED_DIR': os.path.join(work_dir, 'processed'),
+        'COLLECTIONS_DIR': os.path.join(work_dir, 'collections'),
+        'OCR_CACHE_DIR': os.path.join(work_dir, 'ocr_cache'),
+    }
+    os.environ.update(paths)
+
+
+def bench_chunking(args) -> Dict:
+    from app.utils import chunk_text
+    from benchmarks.synthetic import random_text_data
+
+    rng = np.random.RandomState(args.seed)
+    docs = [random_text_data(rng, args.pages_per_doc) for _ in range(args.documents)]
+    pages = args.documents * args.pages_per_doc
+
+    results = {}
+    for chunk_size in args.chunk_sizes:
+        samples = []
+        total_chunks = 0
+        start = time.perf_counter()
+        for doc in docs:
+            t0 = time.perf_counter()
+            total_chunks += len(chunk_text(doc, chunk_size=chunk_size, overlap=50))
+            samples.append(time.perf_counter() - t0)
+        elapsed = time.perf_counter() - start
+
+        results[f"chunk_size={chunk_size}"] = {
+            'documents': len(docs),
+            'pages': pages,
+            'chunks': total_chunks,
+            'pages_per_second': round(pages / elapsed, 1),
+            'per_document': latency_stats(samples),
+        }
+    return results
+
+
+def bench_ocr(args) -> Dict:
+    from app.config import settings
+    from app.ocr import OCRProcessor
+    from benchmarks.synthetic import generate_document_corpus
+
+    rng = np.random.RandomState(args.seed)
+    corpus_dir = os.path.join(settings.DATA_DIR, 'corpus')
+    paths = generate_document_corpus(corpus_dir, rng, args.text_pdfs, args.scanned_pdfs, args.pages_per_doc)
+
+    results = {}
+    for mode in args.ocr_modes:
+        settings.OCR_MODE = mode
+        settings.OCR_CACHE_DIR = os.path.join(settings.DATA_DIR, f'ocr_cache_{mode}')
+        processor = OCRProcessor()
+
+        # Second adaptive pass measures re-ingestion served from the page cache
+        passes = ('cold', 'warm') if mode == 'adaptive' else ('cold',)
+        for run in passes:
+            by_kind = {'text': [], 'scanned': []}
+            pages = 0
+            start = time.perf_counter()
+            for path in paths:
+                t0 = time.perf_counter()
+                pages += len(processor.process_document(path)['pages'])
+                kind = 'scanned' if os.path.basename(path).startswith('scanned') else 'text'
+                by_kind[kind].append(time.perf_counter() - t0)
+            elapsed = time.perf_counter() - start
+
+            results[f"{mode}_{run}"] = {
+                'documents': len(paths),
+                'pages': pages,
+                'pages_per_second': round(pages / elapsed, 2),
+                'text_pdf': latency_stats(by_kind['text']),
+                'scanned_pdf': latency_stats(by_kind['scanned']),
+            }
+    return results
+
+
+def bench_embedding(args) -> Dict:
+    from app.config import settings
+    from app.embedding import EmbeddingManager
+    from benchmarks.synthetic import random_sentence
+
+    rng = np.random.RandomState(args.seed)
+    texts = [" ".join(random_sentence(rng) for _ in range(8)) for _ in range(args.embed_texts)]
+
+    load_start = time.perf_counter()
+    manager = EmbeddingManager()
+    results = {'model': settings.EMBEDDING_MODEL, 'model_load_seconds': round(time.perf_counter() - load_start, 3)}
+
+    manager.generate_embeddings(texts[:8])  # Warm-up
+
+    for batch_size in args.batch_sizes:
+        settings.EMBEDDING_BATCH_SIZE = batch_size
+        start = time.perf_counter()
+        manager.generate_embeddings(texts)
+        elapsed = time.perf_counter() - start
+
+        single = []
+        for text in texts[:args.queries]:
+            t0 = time.perf_counter()
+            manager.generate_embeddings([text])
+            single.append(time.perf_counter() - t0)
+
+        results[f"batch_size={batch_size}"] = {
+            'texts': len(texts),
+            'texts_per_second': round(len(texts) / elapsed, 1),
+            'single_query': latency_stats(single),
+        }
+    return results
+
+
+def bench_retriever(args) -> Dict:
+    from app.config import settings
+    from app.catalog import DocumentCatalog
+    from app.retriever import FAISSRetriever
+    from app.sharded_retriever import ShardedFAISSRetriever
+    from benchmarks.synthetic import random_chunk_set
+
+    rng = np.random.RandomState(args.seed)
+    results = {}
+
+    for n in args.vectors:
+        vectors, metadata = random_chunk_set(rng, n, args.dim)
+        queries = rng.standard_normal((args.queries, args.dim)).astype('float32')
+        queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+        for shards in args.shards:
+            index_dir = os.path.join(settings.DATA_DIR, f'retriever_{n}_{shards}')
+            os.makedirs(index_dir, exist_ok=True)
+            catalog = DocumentCatalog(os.path.join(index_dir, 'catalog.db'))
+            if shards > 1:
+                retriever = ShardedFAISSRetriever(index_dir=index_dir, catalog=catalog, num_shards=shards)
+            else:
+                retriever = FAISSRetriever(index_dir=index_dir, catalog=catalog)
+
+            start = time.perf_counter()
+            retriever.build_index(vectors, metadata)
+            build_seconds = time.perf_counter() - start
+
+            samples = []
+            for query in queries:
+                t0 = time.perf_counter()
+                retriever.search(query, top_k=args.top_k)
+                samples.append(time.perf_counter() - t0)
+
+            key = f"vectors={n}" if shards == 1 else f"vectors={n},shards={shards}"
+            results[key] = {
+                'vectors': n,
+                'shards': shards,
+                'dim': args.dim,
+                'build_seconds': round(build_seconds, 3),
+                'index_size_mb': round(retriever.get_index_size_mb(), 1),
+                'queries_per_second': round(len(samples) / sum(samples), 1),
+                'search': latency_stats(samples),
+            }
+
+            del retriever
+        del vectors, metadata
+    return results
+
+
+class StubLLMRunner:
+    """Stand-in for LLMRunner so /query load tests measure only local work"""
+
+    def __init__(self, delay_seconds: float):
+        self.delay_seconds = delay_seconds
+
+    def generate_answer(self, query: str, context: str) -> str:
+        if self.delay_seconds:
+            time.sleep(self.delay_seconds)
+        return f"Stub answer ({len(context)} context chars)"
+
+
+def bench_query(args) -> Dict:
+    import httpx
+    from app.config import settings
+    from app import main
+    from benchmarks.synthetic import random_sentence, random_text_data
+    from app.utils import chunk_text
+
+    rng = np.random.RandomState(args.seed)
+    main.llm_runner = StubLLMRunner(args.llm_delay_ms / 1000.0)
+
+    # Seed the default collection directly; uploads are covered by the OCR suite
+    collection = main.get_collection()
+    for i in range(args.documents):
+        text_data = random_text_data(rng, args.pages_per_doc)
+        collection.catalog.add_document({
+            'doc_id': f"doc_bench_{i:06d}",
+            'filename': f"bench_{i:06d}.pdf",
+            'pages': args.pages_per_doc,
+            'chunks': chunk_text(text_data, chunk_size=512, overlap=50),
+        })
+
+    headers = {"X-API-Key": settings.API_KEY}
+    queries = [random_sentence(rng) for _ in range(args.requests)]
+
+    async def run() -> Dict:
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=600.0) as client:
+            start = time.perf_counter()
+            response = await client.post("/build-index", headers=headers)
+            response.raise_for_status()
+            build = response.json()
+            build['wall_seconds'] = round(time.perf_counter() - start, 3)
+
+            # Warm-up loads the embedding model outside the measured window
+            (await client.post("/query", headers=headers, json={"query": "warm up", "top_k": args.top_k})).raise_for_status()
+
+            slots = asyncio.Semaphore(args.concurrency)
+            samples, server_stages, errors = [], {}, 0
+
+            async def one(q: str):
+                nonlocal errors
+                async with slots:
+                    t0 = time.perf_counter()
+                    r = await client.post("/query", headers=headers, json={"query": q, "top_k": args.top_k})
+                    samples.append(time.perf_counter() - t0)
+                    if r.status_code != 200:
+                        errors += 1
+                        return
+                    body = r.json()
+                    for key in ('embedding_time_ms', 'retrieval_time_ms', 'rerank_time_ms', 'generation_time_ms'):
+                        server_stages.setdefault(key, []).append(body.get(key, 0) / 1000.0)
+
+            start = time.perf_counter()
+            await asyncio.gather(*(one(q) for q in queries))
+            elapsed = time.perf_counter() - start
+
+            return {
+                'build_index': build,
+                'requests': len(queries),
+                'concurrency': args.concurrency,
+                'errors': errors,
+                'requests_per_second': round(len(queries) / elapsed, 1),
+                'latency': latency_stats(samples),
+                'server_stages': {k: latency_stats(v) for k, v in server_stages.items()},
+            }
+
+    return asyncio.run(run())
+
+
+SUITE_FUNCTIONS = {
+    'chunking': bench_chunking,
+    'ocr': bench_ocr,
+    'embedding': bench_embedding,
+    'retriever': bench_retriever,
+    'query': bench_query,
+}
+
+
+def _run_suite(name: str, args) -> Dict:
+    """Entry point of the per-suite child process"""
+    with tempfile.TemporaryDirectory(prefix=f"edgerag-bench-{name}-") as work_dir:
+        _configure_environment(work_dir)
+        start = time.perf_counter()
+        result = SUITE_FUNCTIONS[name](args)
+        return {
+            'results': result,
+            'wall_seconds': round(time.perf_counter() - start, 3),
+            'peak_rss_mb': peak_rss_mb(),
+        }
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(v) for v in value.split(',') if v]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Edge RAG offline benchmarks")
+    parser.add_argument('--suites', default=",".join(SUITES), help=f"Comma-separated subset of {', '.join(SUITES)}")
+    parser.add_argument('--output', help="Write JSON results here instead of stdout")
+    parser.add_argument('--seed', type=int, default=0)
+
+    parser.add_argument('--documents', type=int, default=50, help="Documents for chunking/query suites")
+    parser.add_argument('--pages-per-doc', type=int, default=4)
+    parser.add_argument('--chunk-sizes', type=_int_list, default=[256, 512])
+
+    parser.add_argument('--text-pdfs', type=int, default=5)
+    parser.add_argument('--scanned-pdfs', type=int, default=3)
+    parser.add_argument('--ocr-modes', default="adaptive,legacy")
+
+    parser.add_argument('--embed-texts', type=int, default=1000)
+    parser.add_argument('--batch-sizes', type=_int_list, default=[16, 32, 64])
+
+    parser.add_argument('--vectors', type=_int_list, default=[10000, 100000],
+                        help="Random chunk set sizes for the retriever suite, e.g. 10000,100000,1000000")
+    parser.add_argument('--shards', type=_int_list, default=[1],
+                        help="Shard counts for the retriever suite, e.g. 1,2,4")
+    parser.add_argument('--dim', type=int, default=384)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--top-k', type=int, default=5)
+
+    parser.add_argument('--requests', type=int, default=200, help="/query requests in the load test")
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--llm-delay-ms', type=float, default=0.0, help="Simulated LLM latency of the stub")
+
+    args = parser.parse_args(argv)
+    args.suites = [s for s in args.suites.split(',') if s]
+    args.ocr_modes = [m for m in args.ocr_modes.split(',') if m]
+
+    unknown = set(args.suites) - set(SUITES)
+    if unknown:
+        parser.error(f"Unknown suites: {', '.join(sorted(unknown))}")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'git_commit': _git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'args': {k: v for k, v in vars(args).items() if k != 'output'},
+        },
+        'suites': {},
+    }
+
+    context = multiprocessing.get_context('spawn')
+    for name in args.suites:
+        print(f"Running {name} benchmark...", file=sys.stderr)
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            try:
+                report['suites'][name] = pool.submit(_run_suite, name, args).result()
+            except Exception as e:
+                report['suites'][name] = {'error': f"{type(e).__name__}: {e}"}
+                print(f"  {name} failed: {e}", file=sys.stderr)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w') as f:
+            f.write(output + "\n")
+        print(f"Results written to {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
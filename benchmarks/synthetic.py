@@ -0,0 +1,175 @@
+"""Deterministic synthetic corpora for benchmarks."""
+
+import os
+import zlib
+from typing import Dict, List, Tuple
+import numpy as np
+from PIL import Image, ImageDraw, ImageFilter, ImageFont
+
+VOCABULARY = (
+    "system data model index query document page text embedding vector search result "
+    "memory device edge latency storage network process report analysis invoice contract "
+    "customer payment service quality policy section figure table value total summary "
+    "the of and to in is for on with as by at from that this be are was were it an or"
+).split()
+
+
+def random_sentence(rng: np.random.RandomState, min_words: int = 6, max_words: int = 20) -> str:
+    words = rng.choice(VOCABULARY, size=rng.randint(min_words, max_words + 1))
+    sentence = " ".join(words)
+    return sentence[0].upper() + sentence[1:]
+
+
+def random_page_text(rng: np.random.RandomState, n_sentences: int = 40) -> str:
+    return ". ".join(random_sentence(rng) for _ in range(n_sentences)) + "."
+
+
+def random_text_data(rng: np.random.RandomState, pages: int, sentences_per_page: int = 40) -> Dict:
+    """Page dict in the shape OCRProcessor.process_document returns"""
+    return {
+        'pages': [
+            {'page': n, 'text': random_page_text(rng, sentences_per_page)}
+            for n in range(1, pages + 1)
+        ]
+    }
+
+
+def _pdf_escape(text: str) -> str:
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def write_text_pdf(path: str, page_texts: List[str], font_size: int = 10):
+    """Write a minimal PDF with a real text layer (Helvetica), one string per page"""
+    line_height = font_size * 1.3
+    chars_per_line = int(500 / (font_size * 0.5))
+
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # Pages, filled in once page object numbers are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_refs = []
+
+    for text in page_texts:
+        words = text.split()
+        lines, current = [], ""
+        for word in words:
+            if len(current) + len(word) + 1 > chars_per_line:
+                lines.append(current)
+                current = word
+            else:
+                current = f"{current} {word}".strip()
+        if current:
+            lines.append(current)
+
+        ops = [f"BT /F1 {font_size} Tf {line_height:.1f} TL 50 780 Td"]
+        for line in lines[:int(720 / line_height)]:
+            ops.append(f"({_pdf_escape(line)}) Tj T*")
+        ops.append("ET")
+        stream = zlib.compress("\n".join(ops).encode('latin-1'))
+
+        content_num = len(objects) + 1
+        objects.append(
+            b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(stream) + stream + b"\nendstream"
+        )
+        page_num = len(objects) + 1
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_num
+        )
+        page_refs.append(page_num)
+
+    kids = " ".join(f"{n} 0 R" for n in page_refs)
+    objects[1] = f"<< /Type /Pages /Kids [{kids}] /Count {len(page_refs)} >>".encode()
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for num, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % num + body + b"\nendobj\n"
+
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+
+    with open(path, 'wb') as f:
+        f.write(out)
+
+
+def render_scanned_page(rng: np.random.RandomState, text: str, dpi: int = 200,
+                        font_px: int = 24, noise: float = 0.03) -> Image.Image:
+    """Render text onto a letter-size grayscale page with scan-like noise and blur"""
+    width, height = int(8.5 * dpi), int(11 * dpi)
+    image = Image.new('L', (width, height), color=255)
+    draw = ImageDraw.Draw(image)
+
+    try:
+        font = ImageFont.truetype("DejaVuSans.ttf", font_px)
+    except OSError:
+        font = ImageFont.load_default()
+
+    margin = int(0.75 * dpi)
+    chars_per_line = max(int((width - 2 * margin) / (font_px * 0.55)), 10)
+    y = margin
+    line = ""
+    for word in text.split():
+        if len(line) + len(word) + 1 > chars_per_line:
+            draw.text((margin, y), line, fill=0, font=font)
+            y += int(font_px * 1.4)
+            line = word
+            if y > height - margin:
+                break
+        else:
+            line = f"{line} {word}".strip()
+    if line and y <= height - margin:
+        draw.text((margin, y), line, fill=0, font=font)
+
+    pixels = np.asarray(image, dtype=np.int16)
+    mask = rng.random_sample(pixels.shape) < noise
+    pixels = np.where(mask, 255 - pixels, pixels).astype(np.uint8)
+
+    return Image.fromarray(pixels).filter(ImageFilter.GaussianBlur(0.6))
+
+
+def write_scanned_pdf(path: str, rng: np.random.RandomState, pages: int, dpi: int = 200, font_px: int = 24):
+    """Write an image-only PDF (no text layer), as produced by a scanner"""
+    images = [render_scanned_page(rng, random_page_text(rng), dpi=dpi, font_px=font_px) for _ in range(pages)]
+    images[0].save(path, "PDF", resolution=dpi, save_all=True, append_images=images[1:])
+
+
+def generate_document_corpus(out_dir: str, rng: np.random.RandomState, text_pdfs: int,
+                             scanned_pdfs: int, pages_per_doc: int) -> List[str]:
+    """Write a mixed corpus of text and scanned PDFs; returns their paths"""
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+
+    for i in range(text_pdfs):
+        path = os.path.join(out_dir, f"text_{i:04d}.pdf")
+        write_text_pdf(path, [random_page_text(rng) for _ in range(pages_per_doc)])
+        paths.append(path)
+
+    for i in range(scanned_pdfs):
+        path = os.path.join(out_dir, f"scanned_{i:04d}.pdf")
+        write_scanned_pdf(path, rng, pages_per_doc)
+        paths.append(path)
+
+    return paths
+
+
+def random_chunk_set(rng: np.random.RandomState, n: int, dim: int) -> Tuple[np.ndarray, List[Dict]]:
+    """Unit-norm random vectors with retriever metadata, 100 chunks per fake document"""
+    vectors = rng.standard_normal((n, dim)).astype('float32')
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    metadata = [
+        {
+            'doc_id': f"doc_{i // 100:08d}",
+            'filename': f"synthetic_{i // 100:08d}.pdf",
+            'page': (i % 100) // 10 + 1,
+            'chunk_id': i % 100
+        }
+        for i in range(n)
+    ]
+    return vectors, metadata
@@ -1,24 +1,53 @@
 import httpx
 import json
-from typing import Dict, List, Optional
+import random
+import asyncio
+import inspect
+import importlib.util
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Optional, Sequence
 from pathlib import Path
 
+# HTTP/2 needs the optional h2 package (pip install "httpx[http2]")
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# Responses worth retrying: rate limiting and transient server failures
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# A 5xx may come after the server already did the work, so writes are only retried
+# when the server says it turned the request away
+WRITE_RETRY_STATUS_CODES = {429, 503}
+
+IDEMPOTENT_METHODS = {"GET", "HEAD", "DELETE"}
+
+# Errors raised before the request reached the server, so a retry cannot duplicate work
+RETRY_EXCEPTIONS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+# Called as progress(completed, total, result) after each item of a bulk call
+ProgressCallback = Callable[[int, int, Dict], None]
+
 
 class RAGClient:
     """Python SDK for Edge RAG MVP"""
 
-    def __init__(self, base_url: str = "http://localhost:8000", api_key: str = ""):
+    def __init__(self, base_url: str = "http://localhost:8000", api_key: str = "",
+                 collection: Optional[str] = None):
         self.base_url = base_url.rstrip('/')
         self.api_key = api_key
+        self.collection = collection  # None uses the server's default collection
         self.headers = {"X-API-Key": api_key} if api_key else {}
         self.client = httpx.Client(timeout=300.0)  # 5 min timeout for long operations
 
-    def upload_doc(self, file_path: str) -> str:
+    def _collection_params(self, collection: Optional[str] = None) -> Dict:
+        collection = collection or self.collection
+        return {"collection": collection} if collection else {}
+
+    def upload_doc(self, file_path: str, collection: Optional[str] = None) -> str:
         """
         Upload a document to the RAG system
 
         Args:
             file_path: Path to PDF or image file
+            collection: Collection to use (defaults to the client's collection)
 
         Returns:
             doc_id: Unique document identifier
@@ -33,6 +62,7 @@ class RAGClient:
             response = self.client.post(
                 f"{self.base_url}/upload",
                 headers=self.headers,
+                params=self._collection_params(collection),
                 files=files
             )
 
@@ -40,52 +70,195 @@ class RAGClient:
         data = response.json()
         return data['doc_id']
 
-    def build_index(self) -> Dict:
+    def replace_doc(self, doc_id: str, file_path: str, collection: Optional[str] = None) -> Dict:
+        """
+        Replace the content of an existing document
+
+        Args:
+            doc_id: Document to replace
+            file_path: Path to the new PDF or image file
+            collection: Collection to use (defaults to the client's collection)
+
+        Returns:
+            Dict with upload results
+        """
+        file_path = Path(file_path)
+
+        if not file_path.exists():
+            raise FileNotFoundError(f"File not found: {file_path}")
+
+        with open(file_path, 'rb') as f:
+            files = {'file': (file_path.name, f, 'application/octet-stream')}
+            response = self.client.put(
+                f"{self.base_url}/documents/{doc_id}",
+                headers=self.headers,
+                params=self._collection_params(collection),
+                files=files
+            )
+
+        response.raise_for_status()
+        return response.json()
+
+    def delete_doc(self, doc_id: str, collection: Optional[str] = None) -> Dict:
+        """
+        Delete a document and remove it from search results
+
+        Args:
+            doc_id: Document to delete
+            collection: Collection to use (defaults to the client's collection)
+
+        Returns:
+            Dict with deletion results
+        """
+        response = self.client.delete(
+            f"{self.base_url}/documents/{doc_id}",
+            headers=self.headers,
+            params=self._collection_params(collection)
+        )
+        response.raise_for_status()
+        return response.json()
+
+    def build_index(self, collection: Optional[str] = None, shard: Optional[int] = None) -> Dict:
         """
         Build the FAISS index for all uploaded documents
 
+        Args:
+            collection: Collection to use (defaults to the client's collection)
+            shard: Rebuild only this shard of a sharded index
+
         Returns:
             Dict with index building results
         """
+        params = self._collection_params(collection)
+        if shard is not None:
+            params["shard"] = shard
+
         response = self.client.post(
             f"{self.base_url}/build-index",
-            headers=self.headers
+            headers=self.headers,
+            params=params
         )
         response.raise_for_status()
         return response.json()
 
-    def query(self, query: str, top_k: int = 5) -> Dict:
+    def query(self, query: str, top_k: int = 5, rerank: Optional[bool] = None,
+              mmr: Optional[bool] = None, collection: Optional[str] = None) -> Dict:
         """
         Query the RAG system
 
         Args:
             query: Question to ask
             top_k: Number of relevant chunks to retrieve
+            rerank: Override the server's cross-encoder reranking default
+            mmr: Override the server's MMR diversification default
+            collection: Collection to use (defaults to the client's collection)
 
         Returns:
             Dict with answer and sources
         """
+        payload = {"query": query, "top_k": top_k}
+        if rerank is not None:
+            payload["rerank"] = rerank
+        if mmr is not None:
+            payload["mmr"] = mmr
+        payload.update(self._collection_params(collection))
+
         response = self.client.post(
             f"{self.base_url}/query",
             headers=self.headers,
-            json={"query": query, "top_k": top_k}
+            json=payload
         )
         response.raise_for_status()
         return response.json()
 
-    def list_docs(self) -> List[Dict]:
+    def list_docs(self, fields: Optional[List[str]] = None, filename: Optional[str] = None,
+                  collection: Optional[str] = None) -> List[Dict]:
         """
         List all uploaded documents
 
+        Args:
+            fields: Document fields to return (default: all)
+            filename: Only return documents whose filename contains this string
+            collection: Collection to use (defaults to the client's collection)
+
         Returns:
             List of document metadata
         """
+        return list(self.iter_docs(fields=fields, filename=filename, collection=collection))
+
+    def list_docs_page(self, limit: int = 50, cursor: Optional[str] = None,
+                       fields: Optional[List[str]] = None,
+                       filename: Optional[str] = None, collection: Optional[str] = None) -> Dict:
+        """
+        List one page of uploaded documents
+
+        Args:
+            limit: Maximum number of documents to return
+            cursor: Cursor returned by a previous page (next_cursor of that page)
+            fields: Document fields to return (default: all)
+            filename: Only return documents whose filename contains this string
+            collection: Collection to use (defaults to the client's collection)
+
+        Returns:
+            Page with 'documents' and 'next_cursor' (None on the last page)
+        """
+        return self._list_docs_page(limit, cursor, fields, filename, collection)
+
+    def iter_docs(self, page_size: int = 200, fields: Optional[List[str]] = None,
+                  filename: Optional[str] = None, collection: Optional[str] = None) -> Iterator[Dict]:
+        """
+        Iterate over all uploaded documents, fetching one page at a time
+
+        Args:
+            page_size: Number of documents per request
+            fields: Document fields to return (default: all)
+            filename: Only return documents whose filename contains this string
+            collection: Collection to use (defaults to the client's collection)
+
+        Yields:
+            Document metadata
+        """
+        cursor = None
+        while True:
+            page = self._list_docs_page(page_size, cursor, fields, filename, collection)
+            yield from page['documents']
+
+            cursor = page.get('next_cursor')
+            if not cursor:
+                break
+
+    def _list_docs_page(self, limit: int, cursor: Optional[str],
+                        fields: Optional[List[str]], filename: Optional[str],
+                        collection: Optional[str] = None) -> Dict:
+        params = {"limit": limit, **self._collection_params(collection)}
+        if cursor:
+            params["cursor"] = cursor
+        if fields:
+            params["fields"] = ",".join(fields)
+        if filename:
+            params["filename"] = filename
+
         response = self.client.get(
             f"{self.base_url}/docs-list",
+            headers=self.headers,
+            params=params
+        )
+        response.raise_for_status()
+        return response.json()
+
+    def list_collections(self) -> List[str]:
+        """
+        List collections available on the server
+
+        Returns:
+            List of collection names
+        """
+        response = self.client.get(
+            f"{self.base_url}/collections",
             headers=self.headers
         )
         response.raise_for_status()
-        return response.json()['documents']
+        return response.json()['collections']
 
     def export_json(self, data: Dict, output_path: str):
         """
@@ -110,6 +283,368 @@ class RAGClient:
         self.close()
 
 
+def _retry_delay(attempt: int, backoff: float, response: Optional[httpx.Response] = None) -> float:
+    """Seconds to wait before the next attempt: Retry-After if given, else exponential with jitter"""
+    if response is not None:
+        retry_after = response.headers.get("Retry-After")
+        if retry_after:
+            try:
+                return max(float(retry_after), 0.0)
+            except ValueError:
+                pass  # HTTP-date form; fall back to backoff
+    return backoff * (2 ** attempt) * random.uniform(0.5, 1.0)
+
+
+class AsyncRAGClient:
+    """Asyncio SDK for Edge RAG MVP with pooled connections, retries and bulk helpers"""
+
+    def __init__(self, base_url: str = "http://localhost:8000", api_key: str = "",
+                 collection: Optional[str] = None, max_connections: int = 10,
+                 max_retries: int = 3, backoff: float = 0.5, http2: bool = True,
+                 timeout: float = 300.0):
+        self.base_url = base_url.rstrip('/')
+        self.api_key = api_key
+        self.collection = collection  # None uses the server's default collection
+        self.headers = {"X-API-Key": api_key} if api_key else {}
+        self.max_retries = max_retries
+        self.backoff = backoff
+
+        # One pooled client for every call; with HTTP/2 concurrent requests share a connection
+        self.client = httpx.AsyncClient(
+            timeout=timeout,
+            http2=http2 and HTTP2_AVAILABLE,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections
+            )
+        )
+
+    def _collection_params(self, collection: Optional[str] = None) -> Dict:
+        collection = collection or self.collection
+        return {"collection": collection} if collection else {}
+
+    async def _request(self, method: str, path: str, file_path: Optional[Path] = None,
+                       idempotent: Optional[bool] = None, **kwargs) -> httpx.Response:
+        """
+        Send a request, retrying on 429/5xx responses and connection failures
+
+        Args:
+            method: HTTP method
+            path: Endpoint path, e.g. "/query"
+            file_path: File to send as the multipart "file" field, reopened on each attempt
+            idempotent: Whether repeating the request is safe (default: by method);
+                non-idempotent requests are only retried on 429/503
+            **kwargs: Passed through to httpx
+
+        Returns:
+            The successful response
+        """
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+        retry_status_codes = RETRY_STATUS_CODES if idempotent else WRITE_RETRY_STATUS_CODES
+
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+
+            try:
+                if file_path is not None:
+                    # httpx reads the open file in chunks, so large files are never held in memory
+                    with open(file_path, 'rb') as f:
+                        files = {'file': (file_path.name, f, 'application/octet-stream')}
+                        response = await self.client.request(
+                            method, f"{self.base_url}{path}",
+                            headers=self.headers, files=files, **kwargs
+                        )
+                else:
+                    response = await self.client.request(
+                        method, f"{self.base_url}{path}", headers=self.headers, **kwargs
+                    )
+            except RETRY_EXCEPTIONS:
+                if last_attempt:
+                    raise
+                await asyncio.sleep(_retry_delay(attempt, self.backoff))
+                continue
+
+            if response.status_code in retry_status_codes and not last_attempt:
+                await asyncio.sleep(_retry_delay(attempt, self.backoff, response))
+                continue
+
+            response.raise_for_status()
+            return response
+
+    @staticmethod
+    def _existing_file(file_path: str) -> Path:
+        path = Path(file_path)
+        if not path.exists():
+            raise FileNotFoundError(f"File not found: {path}")
+        return path
+
+    async def upload_doc(self, file_path: str, collection: Optional[str] = None) -> str:
+        """
+        Upload a document to the RAG system
+
+        Args:
+            file_path: Path to PDF or image file
+            collection: Collection to use (defaults to the client's collection)
+
+        Returns:
+            doc_id: Unique document identifier
+        """
+        response = await self._request(
+            "POST", "/upload",
+            file_path=self._existing_file(file_path),
+            params=self._collection_params(collection)
+        )
+        return response.json()['doc_id']
+
+    async def replace_doc(self, doc_id: str, file_path: str, collection: Optional[str] = None) -> Dict:
+        """
+        Replace the content of an existing document
+
+        Args:
+            doc_id: Document to replace
+            file_path: Path to the new PDF or image file
+            collection: Collection to use (defaults to the client's collection)
+
+        Returns:
+            Dict with upload results
+        """
+        response = await self._request(
+            "PUT", f"/documents/{doc_id}",
+            file_path=self._existing_file(file_path),
+            params=self._collection_params(collection)
+        )
+        return response.json()
+
+    async def delete_doc(self, doc_id: str, collection: Optional[str] = None) -> Dict:
+        """
+        Delete a document and remove it from search results
+
+        Args:
+            doc_id: Document to delete
+            collection: Collection to use (defaults to the client's collection)
+
+        Returns:
+            Dict with deletion results
+        """
+        response = await self._request(
+            "DELETE", f"/documents/{doc_id}", params=self._collection_params(collection)
+        )
+        return response.json()
+
+    async def build_index(self, collection: Optional[str] = None, shard: Optional[int] = None) -> Dict:
+        """
+        Build the FAISS index for all uploaded documents
+
+        Args:
+            collection: Collection to use (defaults to the client's collection)
+            shard: Rebuild only this shard of a sharded index
+
+        Returns:
+            Dict with index building results
+        """
+        params = self._collection_params(collection)
+        if shard is not None:
+            params["shard"] = shard
+
+        response = await self._request("POST", "/build-index", params=params)
+        return response.json()
+
+    async def query(self, query: str, top_k: int = 5, rerank: Optional[bool] = None,
+                    mmr: Optional[bool] = None, collection: Optional[str] = None) -> Dict:
+        """
+        Query the RAG system
+
+        Args:
+            query: Question to ask
+            top_k: Number of relevant chunks to retrieve
+            rerank: Override the server's cross-encoder reranking default
+            mmr: Override the server's MMR diversification default
+            collection: Collection to use (defaults to the client's collection)
+
+        Returns:
+            Dict with answer and sources
+        """
+        payload = {"query": query, "top_k": top_k}
+        if rerank is not None:
+            payload["rerank"] = rerank
+        if mmr is not None:
+            payload["mmr"] = mmr
+        payload.update(self._collection_params(collection))
+
+        # Queries change nothing on the server, so they are retried like reads
+        response = await self._request("POST", "/query", json=payload, idempotent=True)
+        return response.json()
+
+    async def list_docs(self, fields: Optional[List[str]] = None, filename: Optional[str] = None,
+                        collection: Optional[str] = None) -> List[Dict]:
+        """
+        List all uploaded documents
+
+        Args:
+            fields: Document fields to return (default: all)
+            filename: Only return documents whose filename contains this string
+            collection: Collection to use (defaults to the client's collection)
+
+        Returns:
+            List of document metadata
+        """
+        return [doc async for doc in self.iter_docs(fields=fields, filename=filename, collection=collection)]
+
+    async def list_docs_page(self, limit: int = 50, cursor: Optional[str] = None,
+                             fields: Optional[List[str]] = None,
+                             filename: Optional[str] = None, collection: Optional[str] = None) -> Dict:
+        """
+        List one page of uploaded documents
+
+        Args:
+            limit: Maximum number of documents to return
+            cursor: Cursor returned by a previous page (next_cursor of that page)
+            fields: Document fields to return (default: all)
+            filename: Only return documents whose filename contains this string
+            collection: Collection to use (defaults to the client's collection)
+
+        Returns:
+            Page with 'documents' and 'next_cursor' (None on the last page)
+        """
+        return await self._list_docs_page(limit, cursor, fields, filename, collection)
+
+    async def iter_docs(self, page_size: int = 200, fields: Optional[List[str]] = None,
+                        filename: Optional[str] = None,
+                        collection: Optional[str] = None) -> AsyncIterator[Dict]:
+        """
+        Iterate over all uploaded documents, fetching one page at a time
+
+        Args:
+            page_size: Number of documents per request
+            fields: Document fields to return (default: all)
+            filename: Only return documents whose filename contains this string
+            collection: Collection to use (defaults to the client's collection)
+
+        Yields:
+            Document metadata
+        """
+        cursor = None
+        while True:
+            page = await self._list_docs_page(page_size, cursor, fields, filename, collection)
+            for doc in page['documents']:
+                yield doc
+
+            cursor = page.get('next_cursor')
+            if not cursor:
+                break
+
+    async def _list_docs_page(self, limit: int, cursor: Optional[str],
+                              fields: Optional[List[str]], filename: Optional[str],
+                              collection: Optional[str] = None) -> Dict:
+        params = {"limit": limit, **self._collection_params(collection)}
+        if cursor:
+            params["cursor"] = cursor
+        if fields:
+            params["fields"] = ",".join(fields)
+        if filename:
+            params["filename"] = filename
+
+        response = await self._request("GET", "/docs-list", params=params)
+        return response.json()
+
+    async def list_collections(self) -> List[str]:
+        """
+        List collections available on the server
+
+        Returns:
+            List of collection names
+        """
+        response = await self._request("GET", "/collections")
+        return response.json()['collections']
+
+    async def _run_bulk(self, items: Sequence, run_one: Callable, concurrency: int,
+                        progress: Optional[ProgressCallback]) -> List[Dict]:
+        """Run run_one over items with at most `concurrency` in flight; results keep input order"""
+        slots = asyncio.Semaphore(max(concurrency, 1))
+        results: List[Optional[Dict]] = [None] * len(items)
+        completed = 0
+
+        async def worker(position: int, item):
+            nonlocal completed
+            async with slots:
+                result = await run_one(item)
+            results[position] = result
+
+            completed += 1
+            if progress is not None:
+                outcome = progress(completed, len(items), result)
+                if inspect.isawaitable(outcome):
+                    await outcome
+
+        await asyncio.gather(*(worker(i, item) for i, item in enumerate(items)))
+        return results
+
+    async def upload_many(self, file_paths: Sequence[str], concurrency: int = 4,
+                          collection: Optional[str] = None,
+                          progress: Optional[ProgressCallback] = None) -> List[Dict]:
+        """
+        Upload many documents concurrently
+
+        A failed file does not stop the batch; its result carries the error instead.
+
+        Args:
+            file_paths: Paths to PDF or image files
+            concurrency: Maximum uploads in flight at once
+            collection: Collection to use (defaults to the client's collection)
+            progress: Optional callback(completed, total, result), sync or async
+
+        Returns:
+            One dict per file, in input order: file_path, doc_id and error (None on success)
+        """
+        async def upload_one(file_path: str) -> Dict:
+            try:
+                doc_id = await self.upload_doc(file_path, collection)
+                return {"file_path": str(file_path), "doc_id": doc_id, "error": None}
+            except (httpx.HTTPError, OSError) as e:
+                return {"file_path": str(file_path), "doc_id": None, "error": str(e)}
+
+        return await self._run_bulk(list(file_paths), upload_one, concurrency, progress)
+
+    async def query_many(self, queries: Sequence[str], concurrency: int = 4, top_k: int = 5,
+                         rerank: Optional[bool] = None, mmr: Optional[bool] = None,
+                         collection: Optional[str] = None,
+                         progress: Optional[ProgressCallback] = None) -> List[Dict]:
+        """
+        Run many queries concurrently
+
+        Args:
+            queries: Questions to ask
+            concurrency: Maximum queries in flight at once
+            top_k: Number of relevant chunks to retrieve per query
+            rerank: Override the server's cross-encoder reranking default
+            mmr: Override the server's MMR diversification default
+            collection: Collection to use (defaults to the client's collection)
+            progress: Optional callback(completed, total, result), sync or async
+
+        Returns:
+            One dict per query, in input order: query, response and error (None on success)
+        """
+        async def query_one(query: str) -> Dict:
+            try:
+                response = await self.query(query, top_k, rerank, mmr, collection)
+                return {"query": query, "response": response, "error": None}
+            except httpx.HTTPError as e:
+                return {"query": query, "response": None, "error": str(e)}
+
+        return await self._run_bulk(list(queries), query_one, concurrency, progress)
+
+    async def aclose(self):
+        """Close the HTTP client"""
+        await self.client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.aclose()
+
+
 # Example usage
 if __name__ == "__main__":
     # Initialize client
@@ -131,4 +666,17 @@ if __name__ == "__main__":
         print(f"Source: {source['filename']} (page {source['page']}, score: {source['score']:.3f})")
 
     # Export results
-    client.export_json(response, "query_result.json")
\ No newline at end of file
+    client.export_json(response, "query_result.json")
+
+    # Bulk upload with the async client
+    async def bulk_upload(paths: List[str]):
+        async with AsyncRAGClient(api_key="your-secret-api-key-here") as async_client:
+            results = await async_client.upload_many(
+                paths,
+                concurrency=8,
+                progress=lambda done, total, result: print(f"{done}/{total} {result['file_path']}")
+            )
+            failed = [r for r in results if r['error']]
+            print(f"Uploaded {len(results) - len(failed)} documents, {len(failed)} failed")
+
+    asyncio.run(bulk_upload(["sample.pdf"]))
\ No newline at end of file
@@ -0,0 +1,36 @@
+import os
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pytest
+
+from app.config import settings
+from app.catalog import DocumentCatalog
+
+
+def make_chunks(doc_ids: List[str], chunks_per_doc: int, dim: int = 8,
+                seed: int = 0) -> Tuple[np.ndarray, List[Dict]]:
+    """Random vectors with retriever metadata, chunks_per_doc per document"""
+    rng = np.random.RandomState(seed)
+    metadata = [
+        {'doc_id': doc_id, 'filename': f"{doc_id}.pdf", 'page': 1, 'chunk_id': chunk_id}
+        for doc_id in doc_ids
+        for chunk_id in range(chunks_per_doc)
+    ]
+    return rng.standard_normal((len(metadata), dim)).astype('float32'), metadata
+
+
+@pytest.fixture
+def chunks():
+    return make_chunks
+
+
+@pytest.fixture
+def catalog(tmp_path) -> DocumentCatalog:
+    return DocumentCatalog(os.path.join(str(tmp_path), "catalog.db"))
+
+
+@pytest.fixture(autouse=True)
+def no_background_compaction(monkeypatch):
+    # Tests compact explicitly; a background thread would race their assertions
+    monkeypatch.setattr(settings, "COMPACTION_THRESHOLD", 2.0)
@@ -0,0 +1,48 @@
+import os
+import time
+
+from app.config import settings
+from app.bulk_ingest import BulkIngester
+from app.collection_manager import Collection
+
+
+def _add_document(catalog, doc_id: str, num_chunks: int):
+    catalog.add_document({
+        'doc_id': doc_id,
+        'filename': f"{doc_id}.pdf",
+        'file_path': None,
+        'pages': 1,
+        'content_hash': doc_id,
+        'created_at': time.time(),
+        'chunks': [{'text': f"{doc_id} chunk {i}", 'page': 1} for i in range(num_chunks)]
+    })
+
+
+def test_resume_loads_chunks_only_for_unindexed_documents(tmp_path, monkeypatch, chunks):
+    monkeypatch.setattr(settings, "COLLECTIONS_DIR", os.path.join(str(tmp_path), "collections"))
+    collection = Collection("manuals")
+
+    for doc_id in ('doc_a', 'doc_b', 'doc_c'):
+        _add_document(collection.catalog, doc_id, 2)
+    _add_document(collection.catalog, 'doc_empty', 0)
+
+    vectors, metadata = chunks(['doc_a'], 2)
+    collection.retriever.build_index(vectors, metadata)
+
+    loaded = []
+    get_document = collection.catalog.get_document
+
+    def tracking_get_document(doc_id, include_chunks=True):
+        if include_chunks:
+            loaded.append(doc_id)
+        return get_document(doc_id, include_chunks=include_chunks)
+
+    monkeypatch.setattr(collection.catalog, "get_document", tracking_get_document)
+
+    ingester = BulkIngester(collection, workers=1, embed_batch=100, checkpoint_chunks=100)
+    ingester._resume_unindexed()
+
+    assert loaded == ['doc_b', 'doc_c']
+    assert ingester._texts == ["doc_b chunk 0", "doc_b chunk 1", "doc_c chunk 0", "doc_c chunk 1"]
+    assert [(m['doc_id'], m['chunk_id']) for m in ingester._metadata] == \
+        [('doc_b', 0), ('doc_b', 1), ('doc_c', 0), ('doc_c', 1)]
@@ -0,0 +1,171 @@
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from app.catalog import CATALOG_FIELDS, DocumentCatalog
+from app.ingestion import DocumentIngestion
+
+
+def _doc(doc_id: str, filename: str = None, num_chunks: int = 1) -> dict:
+    return {
+        'doc_id': doc_id,
+        'filename': filename or f"{doc_id}.pdf",
+        'file_path': f"uploads/{doc_id}.pdf",
+        'pages': 1,
+        'content_hash': f"hash-{doc_id}",
+        'created_at': time.time(),
+        'chunks': [{'text': f"{doc_id} chunk {i}", 'page': 1} for i in range(num_chunks)]
+    }
+
+
+def _all_pages(catalog, limit: int, **kwargs) -> list:
+    pages, cursor = [], None
+    while True:
+        documents, cursor = catalog.list_documents(cursor=cursor, limit=limit, **kwargs)
+        pages.append([d['doc_id'] for d in documents])
+        if cursor is None:
+            return pages
+
+
+def test_cursor_pages_cover_every_document_once(catalog):
+    for i in range(7):
+        catalog.add_document(_doc(f"doc_{i}"))
+
+    assert _all_pages(catalog, 3) == [["doc_0", "doc_1", "doc_2"], ["doc_3", "doc_4", "doc_5"], ["doc_6"]]
+    assert _all_pages(catalog, 7) == [[f"doc_{i}" for i in range(7)]]
+
+
+def test_cursor_is_stable_across_deletes_and_inserts(catalog):
+    for i in range(4):
+        catalog.add_document(_doc(f"doc_{i}"))
+
+    documents, cursor = catalog.list_documents(limit=2)
+    catalog.delete_document("doc_1")
+    catalog.delete_document("doc_2")
+    catalog.add_document(_doc("doc_4"))
+
+    documents, cursor = catalog.list_documents(cursor=cursor, limit=2)
+    assert [d['doc_id'] for d in documents] == ["doc_3", "doc_4"]
+    assert cursor is None
+
+
+def test_invalid_cursor_and_fields_are_rejected(catalog):
+    with pytest.raises(ValueError):
+        catalog.list_documents(cursor="not-a-cursor")
+    with pytest.raises(ValueError):
+        catalog.list_documents(fields=["doc_id", "chunks"])
+
+
+def test_filename_filter_matches_substring_literally(catalog):
+    for doc_id, filename in [("a", "report_2024.pdf"), ("b", "report-2024.pdf"), ("c", "100%_done.pdf"),
+                             ("d", "1000_done.pdf"), ("e", "back\\slash.pdf"), ("f", "Report_2024.PDF")]:
+        catalog.add_document(_doc(doc_id, filename))
+
+    def matching(filename):
+        return [d['doc_id'] for d in catalog.list_documents(filename=filename)[0]]
+
+    # _ and % are literal characters, not LIKE wildcards
+    assert matching("report_2024") == ["a", "f"]
+    assert matching("100%") == ["c"]
+    assert matching("\\") == ["e"]
+    assert matching("2024") == ["a", "b", "f"]
+    assert catalog.count(filename="_done") == 2
+    assert _all_pages(catalog, 1, filename="2024") == [["a"], ["b"], ["f"]]
+
+
+def test_fields_projection_returns_only_requested_columns(catalog):
+    catalog.add_document(_doc("doc_0", num_chunks=3))
+
+    documents, _ = catalog.list_documents(fields=["doc_id", "num_chunks"])
+    assert documents == [{'doc_id': "doc_0", 'num_chunks': 3}]
+
+    documents, _ = catalog.list_documents()
+    assert set(documents[0]) == set(CATALOG_FIELDS)
+
+
+def test_total_is_only_counted_on_first_page_unless_requested(catalog):
+    ingest = DocumentIngestion.__new__(DocumentIngestion)
+    ingest.catalog = catalog
+    for i in range(5):
+        catalog.add_document(_doc(f"doc_{i}", filename="a.pdf" if i % 2 else "b.pdf"))
+
+    _, cursor, total = ingest.list_documents(limit=2)
+    assert total == 5
+
+    _, _, total = ingest.list_documents(cursor=cursor, limit=2)
+    assert total is None
+
+    _, _, total = ingest.list_documents(cursor=cursor, limit=2, filename="a.pdf", include_total=True)
+    assert total == 2
+
+
+def test_migrate_json_imports_once_and_moves_file_aside(tmp_path, catalog):
+    json_path = os.path.join(str(tmp_path), "documents.json")
+    legacy = {doc_id: _doc(doc_id, num_chunks=2) for doc_id in ("doc_0", "doc_1")}
+    with open(json_path, 'w') as f:
+        json.dump(legacy, f)
+
+    catalog.migrate_json(json_path)
+
+    assert not os.path.exists(json_path)
+    assert os.path.exists(json_path + ".migrated")
+    assert catalog.get_document("doc_1") == dict(legacy["doc_1"], num_chunks=2)
+
+    # Re-running finds nothing to import and leaves the catalog untouched
+    catalog.delete_document("doc_0")
+    catalog.migrate_json(json_path)
+    assert [d['doc_id'] for d in catalog.iter_documents(include_chunks=False)] == ["doc_1"]
+
+    # A migration interrupted before the file was moved aside is simply redone
+    with open(json_path, 'w') as f:
+        json.dump(legacy, f)
+    catalog.migrate_json(json_path)
+    assert catalog.count() == 2
+    assert catalog.get_document("doc_0")['chunks'] == legacy["doc_0"]['chunks']
+
+
+def test_add_document_replaces_rows_and_keeps_position(catalog):
+    for doc_id in ("doc_0", "doc_1"):
+        catalog.add_document(_doc(doc_id, num_chunks=3))
+    original = catalog.get_document("doc_0")
+
+    catalog.add_document(dict(_doc("doc_0", filename="new.pdf", num_chunks=1), created_at=0.0))
+
+    doc = catalog.get_document("doc_0")
+    assert doc['filename'] == "new.pdf"
+    assert doc['num_chunks'] == 1
+    assert doc['chunks'] == [{'text': "doc_0 chunk 0", 'page': 1}]
+    # Replacing a document keeps its upload time and its place in listings
+    assert doc['created_at'] == original['created_at']
+    assert [d['doc_id'] for d in catalog.list_documents()[0]] == ["doc_0", "doc_1"]
+    assert catalog.get_chunk_texts([("doc_0", 2)]) == {}
+
+
+def test_concurrent_writers_do_not_lose_documents(tmp_path):
+    db_path = os.path.join(str(tmp_path), "catalog.db")
+    catalogs = [DocumentCatalog(db_path), DocumentCatalog(db_path)]
+    errors = []
+
+    def write(catalog, prefix):
+        try:
+            for i in range(50):
+                catalog.add_document(_doc(f"{prefix}_{i}", num_chunks=5))
+                catalog.get_document(f"{prefix}_{i}")
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=write, args=(catalogs[0], "a")),
+               threading.Thread(target=write, args=(catalogs[1], "b")),
+               threading.Thread(target=write, args=(catalogs[0], "c"))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    reader = DocumentCatalog(db_path)
+    assert reader.count() == 150
+    assert all(d['num_chunks'] == 5 for d in reader.iter_documents(include_chunks=False))
@@ -0,0 +1,77 @@
+import os
+
+import pytest
+
+from app.config import settings
+from app.collection_manager import CollectionManager, CollectionNotFoundError
+from app.retriever import FAISSRetriever
+
+
+@pytest.fixture
+def collections_dir(tmp_path, monkeypatch):
+    path = os.path.join(str(tmp_path), "collections")
+    os.makedirs(path)
+    monkeypatch.setattr(settings, "COLLECTIONS_DIR", path)
+    return path
+
+
+def test_reading_unknown_collection_does_not_create_it(collections_dir):
+    manager = CollectionManager()
+
+    with pytest.raises(CollectionNotFoundError):
+        manager.get("manuals")
+
+    assert not os.path.exists(os.path.join(collections_dir, "manuals"))
+    assert manager.open_names() == []
+
+
+def test_write_paths_create_collections(collections_dir):
+    manager = CollectionManager()
+
+    manager.get("manuals", create=True)
+
+    assert os.path.exists(os.path.join(collections_dir, "manuals", "catalog.db"))
+    assert CollectionManager().get("manuals").name == "manuals"
+    assert "manuals" in manager.list_names()
+
+
+def test_loading_a_retriever_enforces_the_memory_budget(collections_dir, chunks):
+    vectors, metadata = chunks(['doc_a'], 4)
+    for name in ("first", "second"):
+        CollectionManager().get(name, create=True).retriever.build_index(vectors, metadata)
+
+    # Room for one loaded index but not two
+    manager = CollectionManager()
+    manager.memory_budget = manager.get("first").retriever.memory_bytes() * 3 // 2
+
+    # The second index's size is unknown until it loads, so opening it evicts nothing
+    second = manager.get("second")
+    assert manager.open_names() == ["first", "second"]
+
+    second.retriever
+    assert manager.open_names() == ["second"]
+
+
+def test_collection_evicted_while_in_use_shares_its_retriever(collections_dir, chunks):
+    vectors, metadata = chunks(['doc_a', 'doc_b'], 4)
+    for name in ("first", "second"):
+        CollectionManager().get(name, create=True).retriever.build_index(vectors, metadata)
+
+    manager = CollectionManager()
+    in_use = manager.get("first")
+    retriever = in_use.retriever
+    manager.memory_budget = retriever.memory_bytes() * 3 // 2
+
+    manager.get("second").retriever
+    assert manager.open_names() == ["second"]
+
+    # A request still holding the evicted collection and one reopening it write to the same index
+    reopened = manager.get("first").retriever
+    assert reopened is retriever
+    reopened.tombstone_document('doc_a')
+    added_vectors, added_metadata = chunks(['doc_c'], 2, seed=1)
+    in_use.retriever.add_vectors(added_vectors, added_metadata)
+
+    saved = FAISSRetriever(index_dir=in_use.index_dir, catalog=in_use.catalog)
+    assert saved.doc_ids() == {'doc_a', 'doc_b', 'doc_c'}
+    assert {saved.metadata[i]['doc_id'] for i in saved.tombstones} == {'doc_a'}
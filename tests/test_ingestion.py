@@ -0,0 +1,136 @@
+import asyncio
+import hashlib
+import os
+from typing import List
+
+import pytest
+from starlette.requests import Request
+
+from app.config import settings
+from app.ingestion import DocumentIngestion, InvalidUploadError, MultipartUpload, UploadTooLargeError
+
+BOUNDARY = "test-boundary"
+
+
+def _multipart_body(parts: List[bytes]) -> bytes:
+    body = b"".join(b"--" + BOUNDARY.encode() + b"\r\n" + part + b"\r\n" for part in parts)
+    return body + b"--" + BOUNDARY.encode() + b"--\r\n"
+
+
+def _file_part(name: str, filename: str, content: bytes) -> bytes:
+    return (f'Content-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+            f'Content-Type: application/octet-stream\r\n\r\n').encode() + content
+
+
+def _field_part(name: str, value: str) -> bytes:
+    return f'Content-Disposition: form-data; name="{name}"\r\n\r\n{value}'.encode()
+
+
+def _request(body: bytes, content_type: str = f"multipart/form-data; boundary={BOUNDARY}",
+             piece: int = 7) -> Request:
+    """A request whose body arrives in small pieces, like a chunked upload"""
+    messages = [
+        {'type': 'http.request', 'body': body[i:i + piece], 'more_body': i + piece < len(body)}
+        for i in range(0, len(body), piece)
+    ]
+
+    async def receive():
+        return messages.pop(0)
+
+    scope = {'type': 'http', 'method': 'POST', 'path': '/upload',
+             'headers': [(b'content-type', content_type.encode())]}
+    return Request(scope, receive)
+
+
+async def _read_all(upload: MultipartUpload) -> bytes:
+    await upload.start()
+    data = b""
+    while True:
+        chunk = await upload.read(16)
+        if not chunk:
+            return data
+        assert len(chunk) <= 16
+        data += chunk
+
+
+def test_reads_file_part_from_stream():
+    content = os.urandom(1000) + b"\r\n--not-the-boundary\r\n"
+    body = _multipart_body([_field_part("note", "ignored"), _file_part("file", "scan.pdf", content),
+                            _field_part("after", "ignored")])
+    upload = MultipartUpload(_request(body))
+
+    assert asyncio.run(_read_all(upload)) == content
+    assert upload.filename == "scan.pdf"
+
+
+def test_rejects_non_multipart_body():
+    with pytest.raises(InvalidUploadError):
+        MultipartUpload(_request(b"{}", content_type="application/json"))
+
+
+def test_rejects_body_without_file_part():
+    upload = MultipartUpload(_request(_multipart_body([_field_part("file", "not a file")])))
+
+    with pytest.raises(InvalidUploadError):
+        asyncio.run(upload.start())
+
+
+def test_stream_to_disk_stops_at_size_limit(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "MAX_UPLOAD_SIZE_MB", 1)
+    monkeypatch.setattr(settings, "UPLOAD_CHUNK_SIZE_KB", 64)
+    path = os.path.join(str(tmp_path), "doc.pdf")
+
+    async def save(content: bytes) -> str:
+        upload = MultipartUpload(_request(_multipart_body([_file_part("file", "doc.pdf", content)]),
+                                          piece=64 * 1024))
+        await upload.start()
+        return await DocumentIngestion._stream_to_disk(upload, path)
+
+    content = os.urandom(512 * 1024)
+    assert asyncio.run(save(content)) == hashlib.sha256(content).hexdigest()
+    with open(path, 'rb') as f:
+        assert f.read() == content
+
+    with pytest.raises(UploadTooLargeError):
+        asyncio.run(save(os.urandom(2 * 1024 * 1024)))
+
+    # The rejected upload left the earlier file in place and no partial file behind
+    assert sorted(os.listdir(str(tmp_path))) == ["doc.pdf"]
+
+
+def test_replacement_is_staged_until_commit(tmp_path, monkeypatch, catalog):
+    upload_dir = tmp_path / "uploads"
+    upload_dir.mkdir()
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(upload_dir))
+    ingest = DocumentIngestion.__new__(DocumentIngestion)
+    ingest.catalog = catalog
+
+    class _FakeOCR:
+        def process_document(self, path):
+            with open(path, 'rb') as f:
+                return {'pages': [{'page': 1, 'text': f.read().decode()}]}
+
+    ingest.ocr = _FakeOCR()
+
+    def upload(content: bytes, doc_id=None) -> dict:
+        request = _request(_multipart_body([_file_part("file", "doc.txt", content)]))
+        return asyncio.run(ingest.prepare_upload(MultipartUpload(request), doc_id=doc_id))
+
+    original = upload(b"original text")
+    ingest.commit_upload(original)
+    path = original['file_path']
+
+    # An abandoned replacement leaves the current file as it was
+    ingest.discard_upload(upload(b"abandoned text", doc_id=original['doc_id']))
+    assert os.listdir(str(upload_dir)) == [os.path.basename(path)]
+
+    replacement = upload(b"replacement text", doc_id=original['doc_id'])
+    assert replacement['chunks'][0]['text'].startswith("replacement text")
+    with open(path, 'rb') as f:
+        assert f.read() == b"original text"
+
+    ingest.commit_upload(replacement)
+    assert os.listdir(str(upload_dir)) == [os.path.basename(path)]
+    with open(path, 'rb') as f:
+        assert f.read() == b"replacement text"
+    assert catalog.get_document(original['doc_id'])['file_path'] == path
@@ -0,0 +1,70 @@
+import queue
+import threading
+import time
+
+import numpy as np
+
+from app.config import settings
+from app.model_server import EmbeddingServer
+
+
+class _RecordingModel:
+    """Embeds "text-N" as [N] and records the texts of every encode call"""
+
+    embedding_dim = 1
+
+    def __init__(self, on_first_batch=None):
+        self.batches = []
+        self._on_first_batch = on_first_batch
+
+    def generate_embeddings(self, texts):
+        if not self.batches and self._on_first_batch is not None:
+            self._on_first_batch()
+        self.batches.append(list(texts))
+        return np.array([[float(t.split('-')[1])] for t in texts], dtype='float32')
+
+
+def _server(model) -> EmbeddingServer:
+    server = EmbeddingServer.__new__(EmbeddingServer)
+    server.manager = model
+    server._requests = queue.Queue()
+    threading.Thread(target=server._batch_loop, daemon=True).start()
+    return server
+
+
+def test_large_request_is_encoded_in_batches(monkeypatch):
+    monkeypatch.setattr(settings, "EMBEDDING_BATCH_SIZE", 10)
+    model = _RecordingModel()
+    server = _server(model)
+
+    status, embeddings = server._embed([f"text-{i}" for i in range(35)])
+
+    assert status == 'ok'
+    assert [len(batch) for batch in model.batches] == [10, 10, 10, 5]
+    np.testing.assert_array_equal(embeddings[:, 0], np.arange(35))
+
+
+def test_queries_interleave_with_a_large_request(monkeypatch):
+    monkeypatch.setattr(settings, "EMBEDDING_BATCH_SIZE", 10)
+    query_reply = {}
+    query_threads = []
+
+    def send_query():
+        # Arrives while the first slice of the large request is being encoded
+        thread = threading.Thread(target=lambda: query_reply.update(result=server._embed(["text-1000"])))
+        thread.start()
+        query_threads.append(thread)
+        while server._requests.empty():
+            time.sleep(0.001)
+
+    model = _RecordingModel(on_first_batch=send_query)
+    server = _server(model)
+
+    status, embeddings = server._embed([f"text-{i}" for i in range(100)])
+    query_threads[0].join(timeout=5)
+
+    query_batch = next(i for i, batch in enumerate(model.batches) if "text-1000" in batch)
+    assert query_batch == 1
+    assert status == 'ok'
+    np.testing.assert_array_equal(embeddings[:, 0], np.arange(100))
+    assert query_reply['result'][1][0, 0] == 1000
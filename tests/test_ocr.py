@@ -0,0 +1,131 @@
+import os
+from types import SimpleNamespace
+from typing import List, Optional
+
+import pytesseract
+import pytest
+from PIL import Image
+
+from app.config import settings
+from app.ocr import FALLBACK_OCR_DPI, OCRProcessor
+
+TEXT = "A text layer long enough to count as real extractable text on the page."
+
+
+@pytest.fixture
+def ocr(tmp_path, monkeypatch) -> OCRProcessor:
+    monkeypatch.setattr(settings, "OCR_MODE", "adaptive")
+    monkeypatch.setattr(settings, "OCR_CACHE_DIR", os.path.join(str(tmp_path), "ocr_cache"))
+    monkeypatch.setattr(settings, "OCR_MIN_DPI", 150)
+    monkeypatch.setattr(settings, "OCR_MAX_DPI", 400)
+    monkeypatch.setattr(settings, "OCR_TARGET_TEXT_HEIGHT_PX", 30)
+    return OCRProcessor()
+
+
+def _page(images: List[tuple], width: float = 600, height: float = 800):
+    """A pdfplumber-like page with images given as (x0, top, x1, bottom)"""
+    return SimpleNamespace(width=width, height=height, images=[
+        {'x0': x0, 'top': top, 'x1': x1, 'bottom': bottom} for x0, top, x1, bottom in images
+    ])
+
+
+def _ocr_data(heights: List[int], conf: float = 90) -> dict:
+    """pytesseract.image_to_data output with one word per height"""
+    n = len(heights)
+    return {'text': [f"word{i}" for i in range(n)], 'height': heights, 'conf': [conf] * n,
+            'block_num': [1] * n, 'par_num': [1] * n, 'line_num': [1] * n}
+
+
+def test_classify_page():
+    assert OCRProcessor._classify_page(_page([]), None) == 'scanned'
+    assert OCRProcessor._classify_page(_page([(0, 0, 600, 800)]), "   too short   ") == 'scanned'
+    assert OCRProcessor._classify_page(_page([]), TEXT) == 'text'
+    # A logo is not worth OCR'ing, a half-page figure is
+    assert OCRProcessor._classify_page(_page([(0, 0, 100, 100)]), TEXT) == 'text'
+    assert OCRProcessor._classify_page(_page([(0, 0, 600, 200), (0, 400, 600, 600)]), TEXT) == 'mixed'
+
+
+def test_median_text_height_ignores_blank_and_unconfident_words():
+    data = _ocr_data([10, 12, 14, 90, 100])
+    data['text'][3] = "  "
+    data['conf'][4] = 10
+
+    assert OCRProcessor._median_text_height(data) == 12
+    assert OCRProcessor._median_text_height(_ocr_data([20], conf=-1)) is None
+    assert OCRProcessor._median_text_height(_ocr_data([])) is None
+
+
+@pytest.mark.parametrize("heights, dpi", [
+    ([30, 32, 28], 150),  # Readable at the probe resolution
+    ([20, 20, 20], 225),  # Scaled up to bring text to the target height
+    ([5, 5, 5], 400),  # Capped at OCR_MAX_DPI
+    ([], FALLBACK_OCR_DPI),  # Nothing confident to measure
+])
+def test_adaptive_ocr_picks_dpi_from_probe_text_height(ocr, monkeypatch, heights, dpi):
+    monkeypatch.setattr(pytesseract, "image_to_data", lambda image, output_type: _ocr_data(heights))
+    monkeypatch.setattr(pytesseract, "image_to_string", lambda image: f"read at {image.width} px")
+    rendered = []
+
+    def render(render_dpi: int) -> Image.Image:
+        rendered.append(render_dpi)
+        return Image.new('L', (render_dpi, 10), color=255)
+
+    text = ocr._adaptive_ocr(render, cache_tag='page')
+
+    if dpi == 150:
+        assert rendered == [150]
+        assert text == " ".join(f"word{i}" for i in range(len(heights)))
+    else:
+        assert rendered == [150, dpi]
+        assert text == f"read at {dpi} px"
+
+
+def test_adaptive_ocr_reuses_cached_text(ocr, monkeypatch):
+    calls = []
+
+    def image_to_data(image, output_type):
+        calls.append(image.size)
+        return _ocr_data([30])
+
+    monkeypatch.setattr(pytesseract, "image_to_data", image_to_data)
+    image = Image.new('L', (40, 20), color=255)
+
+    assert ocr._adaptive_ocr(lambda dpi: image, cache_tag='page') == "word0"
+    assert ocr._adaptive_ocr(lambda dpi: image, cache_tag='page') == "word0"
+    assert len(calls) == 1
+
+
+def test_cache_key_depends_on_pixels_tag_and_dpi_settings(ocr, monkeypatch):
+    image = Image.new('L', (40, 20), color=255)
+    key = OCRProcessor._cache_key(image, 'page')
+
+    assert OCRProcessor._cache_key(image.copy(), 'page') == key
+    assert OCRProcessor._cache_key(image, 'region') != key
+
+    changed = image.copy()
+    changed.putpixel((3, 3), 0)
+    assert OCRProcessor._cache_key(changed, 'page') != key
+
+    monkeypatch.setattr(settings, "OCR_MAX_DPI", 600)
+    assert OCRProcessor._cache_key(image, 'page') != key
+
+
+def test_cache_evicts_least_recently_used_entries(ocr, monkeypatch):
+    monkeypatch.setattr(settings, "OCR_CACHE_MAX_MB", 1)
+    entry = "x" * (300 * 1024)
+
+    def put(key: str, mtime: Optional[float] = None):
+        ocr._cache_put(key, entry)
+        if mtime is not None:
+            os.utime(ocr._cache_path(key), (mtime, mtime))
+
+    for i, key in enumerate(["aa1", "bb2", "cc3"]):
+        put(key, mtime=1000 + i)
+    # Reading an entry marks it as recently used
+    assert ocr._cache_get("aa1") == entry
+
+    put("dd4")
+
+    assert ocr._cache_get("bb2") is None
+    assert all(ocr._cache_get(key) == entry for key in ["aa1", "cc3", "dd4"])
+    assert ocr._cache_bytes == 3 * len(entry)
@@ -0,0 +1,70 @@
+import asyncio
+from typing import List
+
+import httpx
+import pytest
+
+from sdk.rag_client import AsyncRAGClient, RAGClient
+
+
+def _client(statuses: List[int], calls: List[str]) -> AsyncRAGClient:
+    """A client whose server answers with statuses in turn, then 200"""
+    responses = iter(statuses)
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(f"{request.method} {request.url.path}")
+        status = next(responses, 200)
+        return httpx.Response(status, json={'doc_id': 'doc_1', 'results': [], 'answer': '', 'status': 'ok'})
+
+    client = AsyncRAGClient(max_retries=3, backoff=0.0)
+    client.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return client
+
+
+def test_upload_is_not_retried_after_server_error(tmp_path):
+    path = tmp_path / "doc.pdf"
+    path.write_bytes(b"%PDF")
+    calls = []
+
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(_client([500], calls).upload_doc(str(path)))
+    assert calls == ["POST /upload"]
+
+
+def test_upload_is_retried_when_rejected_by_rate_limit(tmp_path):
+    path = tmp_path / "doc.pdf"
+    path.write_bytes(b"%PDF")
+    calls = []
+
+    assert asyncio.run(_client([429, 503], calls).upload_doc(str(path))) == "doc_1"
+    assert calls == ["POST /upload"] * 3
+
+
+def test_build_index_is_not_retried_after_gateway_error():
+    calls = []
+
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(_client([502], calls).build_index())
+    assert calls == ["POST /build-index"]
+
+
+def test_reads_and_queries_are_retried_after_server_errors():
+    calls = []
+
+    asyncio.run(_client([500, 502], calls).delete_doc("doc_1"))
+    asyncio.run(_client([504], calls).query("question"))
+    assert calls == ["DELETE /documents/doc_1"] * 3 + ["POST /query"] * 2
+
+
+def test_list_docs_returns_every_page():
+    pages = {None: {'documents': [{'doc_id': 'doc_1'}, {'doc_id': 'doc_2'}], 'next_cursor': 'c1'},
+             'c1': {'documents': [{'doc_id': 'doc_3'}], 'next_cursor': None}}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json=pages[request.url.params.get('cursor')])
+
+    client = RAGClient()
+    client.client = httpx.Client(transport=httpx.MockTransport(handler))
+
+    assert [d['doc_id'] for d in client.list_docs()] == ['doc_1', 'doc_2', 'doc_3']
+    assert client.list_docs_page(limit=2)['next_cursor'] == 'c1'
@@ -0,0 +1,45 @@
+import numpy as np
+
+from app.reranker import mmr_select
+
+
+def test_mmr_without_diversity_follows_relevance():
+    query = np.array([1.0, 0.0, 0.0], dtype='float32')
+    embeddings = np.array([[0.2, 1.0, 0.0], [1.0, 0.1, 0.0], [0.6, 0.0, 1.0]], dtype='float32')
+
+    assert mmr_select(query, embeddings, k=3, lambda_mult=1.0) == [1, 2, 0]
+
+
+def test_mmr_skips_near_duplicates():
+    query = np.array([1.0, 0.0], dtype='float32')
+    embeddings = np.array([
+        [1.0, 0.05],  # most relevant
+        [1.0, 0.06],  # near-duplicate of the first
+        [0.7, 0.7],   # less relevant but different
+    ], dtype='float32')
+
+    assert mmr_select(query, embeddings, k=2, lambda_mult=0.3) == [0, 2]
+
+
+def test_mmr_uses_given_relevance_scores():
+    query = np.array([1.0, 0.0], dtype='float32')
+    embeddings = np.array([[1.0, 0.0], [0.0, 1.0]], dtype='float32')
+
+    # Cross-encoder scores override the embedding similarity to the query
+    assert mmr_select(query, embeddings, k=1, relevance=np.array([0.1, 0.9]))[0] == 1
+
+
+def test_mmr_returns_each_candidate_once():
+    rng = np.random.RandomState(0)
+    query = rng.standard_normal(16).astype('float32')
+    embeddings = rng.standard_normal((10, 16)).astype('float32')
+
+    selected = mmr_select(query, embeddings, k=25)
+    assert sorted(selected) == list(range(10))
+
+
+def test_mmr_handles_empty_input():
+    query = np.ones(4, dtype='float32')
+
+    assert mmr_select(query, np.zeros((0, 4), dtype='float32'), k=5) == []
+    assert mmr_select(query, np.ones((3, 4), dtype='float32'), k=0) == []
@@ -0,0 +1,189 @@
+import os
+
+import faiss
+import numpy as np
+import pytest
+
+from app.config import settings
+from app.retriever import FAISSRetriever, MappedFlatIndex
+
+
+def _vectors_by_key(retriever: FAISSRetriever):
+    """(doc_id, chunk_id) -> stored vector, read back through the id -> metadata mapping"""
+    return {
+        (m['doc_id'], m['chunk_id']): retriever.index.reconstruct(i)
+        for i, m in enumerate(retriever.metadata)
+    }
+
+
+@pytest.mark.parametrize("shared", [False, True])
+def test_search_skips_tombstones_without_fetching_them(tmp_path, catalog, chunks, monkeypatch, shared):
+    monkeypatch.setattr(settings, "INDEX_MMAP", shared)
+    retriever = FAISSRetriever(index_dir=os.path.join(str(tmp_path), "index"), catalog=catalog)
+    doc_ids = [f"doc_{i}" for i in range(10)]
+    vectors, metadata = chunks(doc_ids, 10)
+    retriever.build_index(vectors, metadata)
+    for doc_id in doc_ids[:3]:
+        retriever.tombstone_document(doc_id)
+    assert isinstance(retriever.index, MappedFlatIndex) == shared
+
+    fetched = []
+    search = type(retriever.index).search
+
+    def recording_search(self, queries, k, **kwargs):
+        fetched.append(k)
+        return search(self, queries, k, **kwargs)
+
+    monkeypatch.setattr(type(retriever.index), "search", recording_search)
+
+    live = [i for i, m in enumerate(metadata) if m['doc_id'] in doc_ids[3:]]
+    for query in chunks(["query"], 10, seed=3)[0]:
+        hits = retriever.search_vectors(query, top_k=5)
+
+        distances = ((vectors[live] - query) ** 2).sum(axis=1)
+        expected = [metadata[live[i]] for i in np.argsort(distances)[:5]]
+        assert [hit[1] for hit in hits] == expected
+
+    # The flat index filters while scanning; the mapped one over-fetches in small rounds, never top_k + 30
+    if shared:
+        assert max(fetched) == 20
+    else:
+        assert set(fetched) == {5}
+
+
+def test_compaction_drops_tombstoned_vectors(tmp_path, catalog, chunks):
+    retriever = FAISSRetriever(index_dir=os.path.join(str(tmp_path), "index"), catalog=catalog)
+    vectors, metadata = chunks(['doc_a', 'doc_b', 'doc_c'], 4)
+    retriever.build_index(vectors, metadata)
+
+    assert retriever.tombstone_document('doc_b') == 4
+    retriever.compact()
+
+    assert retriever.ntotal == 8
+    assert retriever.num_tombstones == 0
+    assert retriever.doc_ids() == {'doc_a', 'doc_c'}
+
+    expected = {(m['doc_id'], m['chunk_id']): v for m, v in zip(metadata, vectors)}
+    for key, vector in _vectors_by_key(retriever).items():
+        np.testing.assert_array_equal(vector, expected[key])
+
+
+def test_compaction_remaps_writes_made_during_rebuild(tmp_path, catalog, chunks, monkeypatch):
+    index_dir = os.path.join(str(tmp_path), "index")
+    retriever = FAISSRetriever(index_dir=index_dir, catalog=catalog)
+    vectors, metadata = chunks(['doc_a', 'doc_b', 'doc_c'], 4)
+    retriever.build_index(vectors, metadata)
+    retriever.tombstone_document('doc_a')
+
+    appended_vectors, appended_metadata = chunks(['doc_d'], 3, seed=1)
+    real_index_flat = faiss.IndexFlatL2
+
+    def index_flat_with_concurrent_writes(dimension):
+        # Runs once the vectors are snapshotted, while the rebuild holds no lock
+        monkeypatch.setattr(faiss, 'IndexFlatL2', real_index_flat)
+        retriever.add_vectors(appended_vectors, appended_metadata)
+        retriever.tombstone_document('doc_b')
+        return real_index_flat(dimension)
+
+    monkeypatch.setattr(faiss, 'IndexFlatL2', index_flat_with_concurrent_writes)
+    retriever.compact()
+
+    # doc_a is gone; doc_d was carried over; doc_b's tombstones follow it to its new ids
+    assert retriever.ntotal == 11
+    assert retriever.doc_ids() == {'doc_b', 'doc_c', 'doc_d'}
+    assert sorted(retriever.metadata[i]['doc_id'] for i in retriever.tombstones) == ['doc_b'] * 4
+
+    expected = {(m['doc_id'], m['chunk_id']): v
+                for m, v in zip(metadata + appended_metadata, np.vstack([vectors, appended_vectors]))}
+    for key, vector in _vectors_by_key(retriever).items():
+        np.testing.assert_array_equal(vector, expected[key])
+
+    for query, meta in zip(np.vstack([vectors, appended_vectors]), metadata + appended_metadata):
+        hits = retriever.search_vectors(query, top_k=3)
+        assert all(hit[1]['doc_id'] in ('doc_c', 'doc_d') for hit in hits)
+        if meta['doc_id'] in ('doc_c', 'doc_d'):
+            assert (hits[0][1]['doc_id'], hits[0][1]['chunk_id']) == (meta['doc_id'], meta['chunk_id'])
+
+    # The compacted state is what was saved
+    reloaded = FAISSRetriever(index_dir=index_dir, catalog=catalog)
+    assert reloaded.ntotal == 11
+    assert reloaded.tombstones == retriever.tombstones
+    assert reloaded.metadata == retriever.metadata
+
+
+def test_compaction_discards_copy_when_index_is_rebuilt(tmp_path, catalog, chunks, monkeypatch):
+    retriever = FAISSRetriever(index_dir=os.path.join(str(tmp_path), "index"), catalog=catalog)
+    vectors, metadata = chunks(['doc_a', 'doc_b'], 4)
+    retriever.build_index(vectors, metadata)
+    retriever.tombstone_document('doc_a')
+
+    rebuilt_vectors, rebuilt_metadata = chunks(['doc_e'], 5, seed=2)
+    real_index_flat = faiss.IndexFlatL2
+
+    def index_flat_with_rebuild(dimension):
+        monkeypatch.setattr(faiss, 'IndexFlatL2', real_index_flat)
+        retriever.build_index(rebuilt_vectors, rebuilt_metadata)
+        return real_index_flat(dimension)
+
+    monkeypatch.setattr(faiss, 'IndexFlatL2', index_flat_with_rebuild)
+    retriever.compact()
+
+    assert retriever.ntotal == 5
+    assert retriever.num_tombstones == 0
+    assert retriever.doc_ids() == {'doc_e'}
+
+
+def _shared(index_dir, catalog, monkeypatch, shared=True) -> FAISSRetriever:
+    monkeypatch.setattr(settings, "INDEX_MMAP", shared)
+    return FAISSRetriever(index_dir=index_dir, catalog=catalog)
+
+
+def test_shared_workers_see_each_others_writes(tmp_path, catalog, chunks, monkeypatch):
+    index_dir = os.path.join(str(tmp_path), "index")
+    writer = _shared(index_dir, catalog, monkeypatch)
+    reader = _shared(index_dir, catalog, monkeypatch)
+    assert not reader.has_index()
+
+    vectors, metadata = chunks(['doc_a', 'doc_b'], 4)
+    writer.build_index(vectors, metadata)
+
+    # Decisions made on the accessors alone reflect the other worker's snapshot
+    assert reader.has_index()
+    assert reader.ntotal == 8
+    assert reader.doc_ids() == {'doc_a', 'doc_b'}
+
+    reader.tombstone_document('doc_a')
+    added_vectors, added_metadata = chunks(['doc_c'], 2, seed=1)
+    reader.add_vectors(added_vectors, added_metadata)
+
+    assert writer.ntotal == 10
+    assert writer.num_tombstones == 4
+    hits = writer.search_vectors(vectors[0], top_k=10)
+    assert {hit[1]['doc_id'] for hit in hits} == {'doc_b', 'doc_c'}
+
+    # The snapshot holds exactly the vectors that were added
+    assert isinstance(writer.index, MappedFlatIndex)
+    np.testing.assert_array_equal(writer.index.vectors, np.vstack([vectors, added_vectors]))
+
+
+def test_shared_start_reexports_index_saved_without_snapshots(tmp_path, catalog, chunks, monkeypatch):
+    index_dir = os.path.join(str(tmp_path), "index")
+    vectors, metadata = chunks(['doc_a', 'doc_b'], 4)
+    _shared(index_dir, catalog, monkeypatch).build_index(vectors, metadata)
+
+    # e.g. bulk_ingest or a deployment without INDEX_MMAP writes index.faiss only
+    unshared = _shared(index_dir, catalog, monkeypatch, shared=False)
+    added_vectors, added_metadata = chunks(['doc_c'], 2, seed=1)
+    unshared.add_vectors(added_vectors, added_metadata)
+    unshared.tombstone_document('doc_a')
+
+    worker = _shared(index_dir, catalog, monkeypatch)
+    assert worker.ntotal == 10
+    assert worker.doc_ids() == {'doc_a', 'doc_b', 'doc_c'}
+    assert {worker.metadata[i]['doc_id'] for i in worker.tombstones} == {'doc_a'}
+
+    # The next shared write builds on the re-exported index, so nothing is lost
+    worker.tombstone_document('doc_b')
+    reopened = _shared(index_dir, catalog, monkeypatch, shared=False)
+    assert reopened.ntotal == 10
+    assert {reopened.metadata[i]['doc_id'] for i in reopened.tombstones} == {'doc_a', 'doc_b'}
@@ -0,0 +1,129 @@
+import os
+import threading
+
+import pytest
+
+from app.config import settings
+from app.retriever import FAISSRetriever
+from app.sharded_retriever import SHARD_MANIFEST, ShardedFAISSRetriever
+
+DOC_IDS = [f"doc_{i:03d}" for i in range(20)]
+
+
+def _keys(results):
+    return [(r['metadata']['doc_id'], r['metadata']['chunk_id']) for r in results]
+
+
+def test_migration_splits_single_index_and_retires_its_files(tmp_path, catalog, chunks):
+    index_dir = os.path.join(str(tmp_path), "index")
+    vectors, metadata = chunks(DOC_IDS, 5)
+    single = FAISSRetriever(index_dir=index_dir, catalog=catalog)
+    single.build_index(vectors, metadata)
+    single.tombstone_document(DOC_IDS[0])
+    expected = [_keys(single.search(query, top_k=5)) for query in vectors[::7]]
+
+    sharded = ShardedFAISSRetriever(index_dir=index_dir, catalog=catalog, num_shards=3)
+
+    assert sharded.num_shards == 3
+    assert sharded.ntotal == len(vectors) - 5
+    assert DOC_IDS[0] not in sharded.doc_ids()
+    assert [_keys(sharded.search(query, top_k=5)) for query in vectors[::7]] == expected
+
+    files = set(os.listdir(index_dir))
+    assert SHARD_MANIFEST in files
+    assert not files & {"index.faiss", "metadata.json", "tombstones.json"}
+    assert {"index.faiss.migrated", "metadata.json.migrated"} <= files
+
+    # Reopening uses the shards rather than migrating again
+    assert ShardedFAISSRetriever(index_dir=index_dir, catalog=catalog, num_shards=3).ntotal == sharded.ntotal
+
+
+def test_interrupted_migration_is_redone(tmp_path, catalog, chunks, monkeypatch):
+    index_dir = os.path.join(str(tmp_path), "index")
+    vectors, metadata = chunks(DOC_IDS, 5)
+    FAISSRetriever(index_dir=index_dir, catalog=catalog).build_index(vectors, metadata)
+
+    def crash(*args):
+        raise RuntimeError("interrupted")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(ShardedFAISSRetriever, "_build_shards", crash)
+        with pytest.raises(RuntimeError):
+            ShardedFAISSRetriever(index_dir=index_dir, catalog=catalog, num_shards=3)
+
+    # No manifest was written, so the single index is still the source of truth
+    assert not os.path.exists(os.path.join(index_dir, SHARD_MANIFEST))
+    assert os.path.exists(os.path.join(index_dir, "index.faiss"))
+
+    assert ShardedFAISSRetriever(index_dir=index_dir, catalog=catalog, num_shards=3).ntotal == len(vectors)
+
+
+def test_searches_do_not_wait_for_shard_builds(tmp_path, catalog, chunks, monkeypatch):
+    sharded = ShardedFAISSRetriever(index_dir=os.path.join(str(tmp_path), "index"), catalog=catalog, num_shards=3)
+    vectors, metadata = chunks(DOC_IDS, 5)
+    sharded.build_index(vectors, metadata)
+
+    release = threading.Event()
+    build_index = FAISSRetriever.build_index
+
+    def slow_build_index(self, *args):
+        release.wait(timeout=10)
+        build_index(self, *args)
+
+    monkeypatch.setattr(FAISSRetriever, "build_index", slow_build_index)
+    rebuild = threading.Thread(target=sharded.build_index, args=(vectors, metadata))
+    rebuild.start()
+    try:
+        search = threading.Thread(target=sharded.search, args=(vectors[0],))
+        search.start()
+        search.join(timeout=5)
+        assert not search.is_alive()
+    finally:
+        release.set()
+        rebuild.join()
+
+
+@pytest.mark.parametrize("num_shards", [2, 3, 7])
+def test_sharded_search_matches_single_index(tmp_path, catalog, chunks, num_shards):
+    vectors, metadata = chunks(DOC_IDS, 5)
+    single = FAISSRetriever(index_dir=os.path.join(str(tmp_path), "single"), catalog=catalog)
+    sharded = ShardedFAISSRetriever(index_dir=os.path.join(str(tmp_path), "sharded"), catalog=catalog,
+                                    num_shards=num_shards)
+    for retriever in (single, sharded):
+        retriever.build_index(vectors, metadata)
+
+    # Appends and deletes are routed to shards but must not change the merged ranking
+    appended_vectors, appended_metadata = chunks(["doc_new"], 4, seed=1)
+    for retriever in (single, sharded):
+        retriever.add_vectors(appended_vectors, appended_metadata)
+        retriever.tombstone_document(DOC_IDS[3])
+
+    assert sharded.ntotal == single.ntotal
+    assert sharded.doc_ids() == single.doc_ids()
+
+    queries = chunks(["query"], 25, seed=2)[0]
+    for top_k in (1, 5, 40):
+        for query in queries:
+            expected = single.search(query, top_k=top_k, include_embeddings=True)
+            results = sharded.search(query, top_k=top_k, include_embeddings=True)
+
+            assert _keys(results) == _keys(expected)
+            assert [r['score'] for r in results] == pytest.approx([r['score'] for r in expected])
+            for result, want in zip(results, expected):
+                assert (result['embedding'] == want['embedding']).all()
+
+
+def test_shared_worker_searches_shards_built_by_another(tmp_path, catalog, chunks, monkeypatch):
+    monkeypatch.setattr(settings, "INDEX_MMAP", True)
+    index_dir = os.path.join(str(tmp_path), "index")
+    writer = ShardedFAISSRetriever(index_dir=index_dir, catalog=catalog, num_shards=3)
+    reader = ShardedFAISSRetriever(index_dir=index_dir, catalog=catalog, num_shards=3)
+
+    vectors, metadata = chunks(DOC_IDS, 5)
+    writer.build_index(vectors, metadata)
+    writer.tombstone_document(DOC_IDS[0])
+
+    for query in vectors[::9]:
+        assert _keys(reader.search(query, top_k=5)) == _keys(writer.search(query, top_k=5))
+    assert reader.ntotal == len(vectors)
+    assert DOC_IDS[0] not in {key[0] for key in _keys(reader.search(vectors[0], top_k=10))}
@@ -165,42 +165,76 @@ function displayQueryResults(result) {
     resultsDiv.innerHTML = html;
 }
 
+let docsCursor = null;
+
+function renderDocumentItems(documents) {
+    return documents.map(doc => `
+                <div class="document-item">
+                    <strong>${doc.filename}</strong>
+                    <br>ID: ${doc.doc_id}
+                    <br>Pages: ${doc.pages}
+                    <br>Chunks: ${doc.num_chunks}
+                </div>
+            `).join('');
+}
+
+async function fetchDocumentsPage(cursor) {
+    const params = new URLSearchParams();
+    if (cursor) {
+        params.set('cursor', cursor);
+    }
+
+    const response = await fetch(`${API_BASE}/docs-list?${params}`, {
+        headers: { 'X-API-Key': apiKey }
+    });
+
+    if (!response.ok) {
+        throw new Error(`Failed to load documents: ${response.statusText}`);
+    }
+
+    return response.json();
+}
+
+function renderLoadMore() {
+    return docsCursor ? '<button id="loadMoreDocs" onclick="loadMoreDocuments()">Load more</button>' : '';
+}
+
 async function loadDocuments() {
     const docsDiv = document.getElementById('documentsList');
     docsDiv.innerHTML = '<div class="loading"></div> Loading documents...';
 
     try {
-        const response = await fetch(`${API_BASE}/docs-list`, {
-            headers: { 'X-API-Key': apiKey }
-        });
-
-        if (!response.ok) {
-            throw new Error(`Failed to load documents: ${response.statusText}`);
-        }
-
-        const result = await response.json();
+        const result = await fetchDocumentsPage(null);
+        docsCursor = result.next_cursor;
 
         if (result.total === 0) {
             docsDiv.innerHTML = '<p>No documents uploaded yet.</p>';
             return;
         }
 
-        let html = `<p><strong>Total documents: ${result.total}</strong></p>`;
+        docsDiv.innerHTML = `
+            <p><strong>Total documents: ${result.total}</strong></p>
+            <div id="documentItems">${renderDocumentItems(result.documents)}</div>
+            ${renderLoadMore()}
+        `;
+    } catch (error) {
+        docsDiv.innerHTML = `<div class="status-error">Error: ${error.message}</div>`;
+    }
+}
 
-        result.documents.forEach(doc => {
-            html += `
-                <div class="document-item">
-                    <strong>${doc.filename}</strong>
-                    <br>ID: ${doc.doc_id}
-                    <br>Pages: ${doc.pages}
-                    <br>Chunks: ${doc.chunks ? doc.chunks.length : 0}
-                </div>
-            `;
-        });
+async function loadMoreDocuments() {
+    const button = document.getElementById('loadMoreDocs');
+    button.disabled = true;
 
-        docsDiv.innerHTML = html;
+    try {
+        const result = await fetchDocumentsPage(docsCursor);
+        docsCursor = result.next_cursor;
+
+        document.getElementById('documentItems').insertAdjacentHTML('beforeend', renderDocumentItems(result.documents));
+        button.outerHTML = renderLoadMore();
     } catch (error) {
-        docsDiv.innerHTML = `<div class="status-error">Error: ${error.message}</div>`;
+        button.disabled = false;
+        button.insertAdjacentHTML('afterend', `<div class="status-error">Error: ${error.message}</div>`);
     }
 }
 